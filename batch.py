@@ -0,0 +1,80 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine import FileResult, convert_file, figure_template, find_workbooks, workbook_name
+from manifest import record_result, split_stale
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def init_worker():
+    os.environ["MPLBACKEND"] = "Agg"
+    import matplotlib
+    matplotlib.use("Agg")
+    # Loads matplotlib's font list, cached on disk, before the first workbook arrives.
+    from style import installed_fonts
+    installed_fonts()
+
+
+def warm_worker(config):
+    # Builds the styled figure and draws it once, so fonts and Agg are loaded before the first workbook.
+    figure_template(config).fig.canvas.draw()
+    return os.getpid()
+
+
+def iter_convert_parallel(config, workers=None, filepaths=None, cancel_event=None):
+    if filepaths is None:
+        filepaths = find_workbooks(config.input_folder)
+    os.makedirs(config.output_folder, exist_ok=True)
+
+    workers = min(workers or default_workers(), max(1, len(filepaths)))
+    if workers <= 1:
+        for filepath in filepaths:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield convert_file(filepath, config)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+    try:
+        futures = {pool.submit(convert_file, filepath, config): filepath for filepath in filepaths}
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            filepath = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                yield FileResult(filepath, workbook_name(filepath),
+                                 error=f"Error processing {workbook_name(filepath)}: {e}")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def convert_folder_parallel(config, workers=None, on_result=None, manifest=None, rebuild=False):
+    # With rebuild, every workbook is rendered and the manifest is only brought up to date.
+    filepaths = find_workbooks(config.input_folder)
+    pending = filepaths
+    results = []
+    if manifest is not None and not rebuild:
+        pending, results = split_stale(filepaths, config, manifest)
+        if on_result is not None:
+            for result in results:
+                on_result(result)
+
+    try:
+        for result in iter_convert_parallel(config, workers, pending):
+            if manifest is not None:
+                record_result(manifest, result, config)
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+    order = {filepath: idx for idx, filepath in enumerate(filepaths)}
+    results.sort(key=lambda result: order[result.filepath])
+    return results
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from batch import convert_folder_parallel
+from engine import GraphConfig, draw_figure, find_workbooks, output_base, save_figure, workbook_name
+from readers import read_sheets
+from smoothing import smooth_series
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return max(peak, children) * scale / 1e6
+
+
+def generate_workbook(filepath, rows, series, sheets, seed=0):
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    workbook = Workbook(write_only=True)
+    for sheet_idx in range(sheets):
+        sheet = workbook.create_sheet(f'Sheet{sheet_idx + 1}')
+        header = []
+        for idx in range(1, series + 1):
+            header += [f'X{idx}', f'Y{idx}']
+        sheet.append(header)
+
+        x = np.sort(rng.uniform(0, 100, size=(series, rows)), axis=1)
+        slope = rng.uniform(0.5, 5, size=(series, 1))
+        y = slope * x ** 1.5 + rng.normal(0, 1, size=(series, rows))
+        columns = np.empty((rows, 2 * series))
+        columns[:, 0::2] = x.T
+        columns[:, 1::2] = y.T
+        for row in columns.tolist():
+            sheet.append(row)
+    workbook.save(filepath)
+
+
+def generate_folder(folder, files, rows, series, sheets):
+    os.makedirs(folder, exist_ok=True)
+    for idx in range(files):
+        generate_workbook(os.path.join(folder, f'bench_{idx + 1:04d}.xlsx'), rows, series, sheets, seed=idx)
+
+
+def time_stages(config):
+    # Pairing the columns happens while each sheet's header is parsed, so it is part of read.
+    stages = {'read': 0.0, 'smooth': 0.0, 'draw': 0.0, 'save': 0.0}
+    files = 0
+    for filepath in find_workbooks(config.input_folder):
+        start = time.perf_counter()
+        sheets = list(read_sheets(filepath, config))
+        stages['read'] += time.perf_counter() - start
+
+        for sheet_name, series in sheets:
+            start = time.perf_counter()
+            for x, y in series:
+                smooth_series(x, y, config.smoothing, config.decimate_threshold)
+            smooth = time.perf_counter() - start
+            stages['smooth'] += smooth
+
+            # draw_figure smooths the series again, so that share is taken off the draw time.
+            start = time.perf_counter()
+            fig = draw_figure(f'{workbook_name(filepath)} - {sheet_name}', series, config)
+            fig.canvas.draw()
+            stages['draw'] += max(0.0, time.perf_counter() - start - smooth)
+
+            # Saving renders the figure once more before encoding, as a real run does.
+            start = time.perf_counter()
+            save_figure(fig, output_base(filepath, config, sheet_name), config)
+            stages['save'] += time.perf_counter() - start
+        files += 1
+
+    return {'files': files,
+            'seconds': {name: round(value, 4) for name, value in stages.items()},
+            'seconds_per_file': {name: round(value / max(1, files), 4) for name, value in stages.items()}}
+
+
+def run_benchmark(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix='excel2graph-bench-')
+    input_folder = os.path.join(workdir, 'input')
+    output_folder = os.path.join(workdir, 'output')
+
+    start = time.perf_counter()
+    generate_folder(input_folder, args.files, args.rows, args.series, args.sheets)
+    generate_seconds = time.perf_counter() - start
+
+    config = GraphConfig(input_folder=input_folder,
+                         output_folder=output_folder,
+                         sheet_name='*' if args.sheets > 1 else 'Sheet1',
+                         num_series=args.series,
+                         reader=args.reader,
+                         smoothing=args.smoothing,
+                         fixed_layout=args.fixed_layout)
+
+    start = time.perf_counter()
+    results = convert_folder_parallel(config, workers=args.workers)
+    end_to_end = time.perf_counter() - start
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {'files': args.files, 'rows': args.rows, 'series': args.series, 'sheets': args.sheets,
+                   'workers': args.workers, 'reader': args.reader, 'smoothing': args.smoothing,
+                   'fixed_layout': args.fixed_layout},
+        'generate_seconds': round(generate_seconds, 4),
+        'end_to_end': {'seconds': round(end_to_end, 4),
+                       'files_per_second': round(len(results) / end_to_end, 4) if end_to_end else None,
+                       'failed': sum(not result.ok for result in results)},
+    }
+    if not args.skip_stages:
+        report['stages'] = time_stages(config)
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    if not args.keep and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the conversion pipeline on synthetic workbooks.")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--series", type=int, default=10)
+    parser.add_argument("--sheets", type=int, default=1)
+    parser.add_argument("-j", "--workers", type=int, default=1)
+    parser.add_argument("--reader", default="auto")
+    parser.add_argument("--smoothing", default="spline")
+    parser.add_argument("--fixed-layout", action="store_true")
+    parser.add_argument("--skip-stages", action="store_true", help="only measure the end-to-end run")
+    parser.add_argument("--workdir", help="generate workbooks and graphs here instead of a temporary folder")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary folder")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+
+from batch import convert_folder_parallel, default_workers
+from engine import GraphConfig, LEGEND_POSITIONS, OUTPUT_FORMATS, compare_workbooks, find_workbooks
+from export import EXPORT_FORMATS, open_export
+from instrument import JsonLogger, format_summary, profiled, summary_record
+from manifest import Manifest
+from profiles import load_profile, save_profile
+from report import REPORT_KINDS, write_report
+from readers import READERS
+from smoothing import STRATEGIES
+from watch import POLL_SECONDS, SETTLE_SECONDS, watch_folder
+
+
+def grid_size(text):
+    # 'COLUMNSxROWS', such as 3x2.
+    try:
+        columns, rows = (int(value) for value in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLUMNSxROWS such as 3x2, got '{text}'")
+    if columns < 1 or rows < 1:
+        raise argparse.ArgumentTypeError(f"columns and rows must be at least 1, got '{text}'")
+    return columns, rows
+
+
+def build_parser(defaults=None):
+    defaults = defaults or GraphConfig()
+    parser = argparse.ArgumentParser(prog="excel2graph",
+                                     description="Convert every .xlsx file in a folder into a graph without the GUI.")
+    parser.add_argument("--settings", metavar="FILE",
+                        help="load the settings from a file saved by the GUI or --save-settings; "
+                             "options given on the command line override them")
+    parser.add_argument("--save-settings", metavar="FILE", help="save the settings of this run to FILE")
+    parser.add_argument("-i", "--input", dest="input_folder", default=defaults.input_folder,
+                        help="folder containing the .xlsx files")
+    parser.add_argument("-o", "--output", dest="output_folder", default=defaults.output_folder,
+                        help="folder the graphs are saved to")
+    parser.add_argument("--sheet", dest="sheet_name", default=defaults.sheet_name,
+                        help="sheet to read, or a glob ('*', 'Test*') or 're:<regex>' to graph every "
+                             "matching sheet in one pass")
+    parser.add_argument("-n", "--series", dest="num_series", type=int, default=defaults.num_series,
+                        help="number of X/Y column pairs to plot")
+    parser.add_argument("--header-row", type=int, default=defaults.header_row,
+                        help="row number of the column headers (default: %(default)s)")
+    parser.add_argument("--x-pattern", default=defaults.x_pattern,
+                        help="prefix of the X column headers, or 're:<regex>' whose first group pairs "
+                             "it with a Y column (default: %(default)s)")
+    parser.add_argument("--y-pattern", default=defaults.y_pattern,
+                        help="prefix or 're:<regex>' of the Y column headers (default: %(default)s)")
+    parser.add_argument("--shared-x", default=defaults.shared_x, help="header (or 're:<regex>') of one X column used for every Y column")
+    parser.add_argument("--x-label", default=defaults.x_label)
+    parser.add_argument("--y-label", default=defaults.y_label)
+    parser.add_argument("--legend", dest="legend_position", default=defaults.legend_position,
+                        choices=LEGEND_POSITIONS)
+    # Every switch has an on and an off form, so it can override a loaded settings file either way.
+    parser.add_argument("--show-legend", dest="show_legend", action="store_true", default=defaults.show_legend)
+    parser.add_argument("--no-legend", dest="show_legend", action="store_false")
+    parser.add_argument("--symbols", dest="show_symbols", action=argparse.BooleanOptionalAction,
+                        default=defaults.show_symbols, help="draw markers on the data points")
+    parser.add_argument("--font", dest="graph_font", default=defaults.graph_font)
+    parser.add_argument("--font-fallback", dest="font_fallbacks", action="append", default=[],
+                        help="font to use when --font is not installed, repeat for a chain")
+    parser.add_argument("--color", dest="series_colors", action="append", default=[],
+                        help="series color, repeat once per series")
+    parser.add_argument("--marker", dest="series_markers", action="append", default=[],
+                        help="series marker, repeat once per series")
+    parser.add_argument("--name", dest="series_names", action="append", default=[],
+                        help="series name, repeat once per series")
+    parser.add_argument("-j", "--workers", type=int, default=default_workers(),
+                        help="number of worker processes, 1 renders serially (default: %(default)s)")
+    parser.add_argument("--fixed-layout", action=argparse.BooleanOptionalAction, default=defaults.fixed_layout,
+                        help="keep fixed margins instead of fitting the layout to each graph (faster)")
+    parser.add_argument("-f", "--format", dest="formats", action="append", choices=OUTPUT_FORMATS,
+                        help="output format, repeat to write several formats from one drawn figure (default: png)")
+    parser.add_argument("--width", type=float, default=defaults.width, help="figure width in inches")
+    parser.add_argument("--height", type=float, default=defaults.height, help="figure height in inches")
+    parser.add_argument("--dpi", type=int, default=defaults.dpi)
+    parser.add_argument("--png-compression", type=int, default=defaults.png_compression, choices=range(10),
+                        metavar="0-9", help="PNG zlib level, lower is faster and larger (default: %(default)s)")
+    parser.add_argument("--quality", type=int, default=defaults.quality,
+                        help="WebP/JPEG quality (default: %(default)s)")
+    parser.add_argument("--smoothing", default=defaults.smoothing, choices=list(STRATEGIES),
+                        help="how curves are drawn through the data points (default: %(default)s)")
+    parser.add_argument("--decimate-threshold", type=int, default=defaults.decimate_threshold,
+                        help="series longer than this many rows are decimated before fitting, 0 disables")
+    parser.add_argument("--reader", default=defaults.reader, choices=["auto", *READERS],
+                        help="workbook parser, auto prefers calamine when it is installed")
+    parser.add_argument("--cache", dest="cache_folder", default=defaults.cache_folder,
+                        help="folder for parsed column caches, reused until a workbook changes")
+    parser.add_argument("--export", dest="export_format", choices=EXPORT_FORMATS, default=defaults.export_format,
+                        help="also write the drawn curves and per-series statistics of the run as CSV or "
+                             "Parquet (needs pyarrow) files in the output folder")
+    parser.add_argument("--compare", metavar="N", type=int,
+                        help="also overlay series N of every workbook onto one comparison.png")
+    parser.add_argument("--log-json", metavar="FILE",
+                        help="write one JSON line per file and a run summary to FILE ('-' for stdout)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print how long each pipeline stage took at the end of the run")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the run with cProfile and save the result in the output folder; "
+                             "renders serially so the profile covers every file")
+    parser.add_argument("--report", choices=REPORT_KINDS,
+                        help="instead of one file per graph, write every graph into one multi-page PDF "
+                             "or into tiled contact sheet PNGs")
+    parser.add_argument("--report-name", default="report", help="file name of the report (default: %(default)s)")
+    parser.add_argument("--grid", type=grid_size, default="3x2",
+                        help="contact sheet columns x rows (default: %(default)s)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip workbooks whose graph is already up to date")
+    parser.add_argument("--check-content", action="store_true",
+                        help="with --incremental, compare file hashes when modification times differ")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and render workbooks as soon as they are added or changed")
+    parser.add_argument("--poll", type=float, default=POLL_SECONDS,
+                        help="with --watch, seconds between folder scans (default: %(default)s)")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="with --watch, seconds a workbook must stay unchanged before it is rendered "
+                             "(default: %(default)s)")
+    return parser
+
+
+def config_from_args(args, defaults=None):
+    # Repeatable options replace the lists of a loaded settings file instead of extending them.
+    defaults = defaults or GraphConfig()
+    return GraphConfig(input_folder=args.input_folder,
+                       output_folder=args.output_folder,
+                       sheet_name=args.sheet_name,
+                       num_series=args.num_series,
+                       header_row=args.header_row,
+                       x_pattern=args.x_pattern,
+                       y_pattern=args.y_pattern,
+                       shared_x=args.shared_x,
+                       x_label=args.x_label,
+                       y_label=args.y_label,
+                       legend_position=args.legend_position,
+                       show_legend=args.show_legend,
+                       show_symbols=args.show_symbols,
+                       graph_font=args.graph_font,
+                       font_fallbacks=args.font_fallbacks or defaults.font_fallbacks,
+                       series_colors=args.series_colors or defaults.series_colors,
+                       series_markers=args.series_markers or defaults.series_markers,
+                       series_names=args.series_names or defaults.series_names,
+                       fixed_layout=args.fixed_layout,
+                       formats=args.formats or defaults.formats,
+                       width=args.width,
+                       height=args.height,
+                       dpi=args.dpi,
+                       png_compression=args.png_compression,
+                       quality=args.quality,
+                       smoothing=args.smoothing,
+                       decimate_threshold=args.decimate_threshold,
+                       reader=args.reader,
+                       cache_folder=args.cache_folder,
+                       export_format=args.export_format,
+                       compare_series=args.compare)
+
+
+def print_result(result):
+    if result.skipped:
+        print(f'{result.filename} is up to date.')
+    elif result.ok:
+        print(f'{result.filename} file has been converted to {", ".join(result.outputs)}!')
+    else:
+        print(result.error, file=sys.stderr)
+
+
+def main(argv=None):
+    settings = argparse.ArgumentParser(add_help=False)
+    settings.add_argument("--settings")
+    known, _ = settings.parse_known_args(argv)
+    defaults = None
+    if known.settings:
+        try:
+            defaults = load_profile(known.settings)
+        except (OSError, ValueError, TypeError) as e:
+            print(f'Could not load settings from {known.settings}: {e}', file=sys.stderr)
+            return 2
+
+    parser = build_parser(defaults)
+    args = parser.parse_args(argv)
+    if args.compare is not None and args.compare < 1:
+        parser.error("--compare: series numbers start at 1")
+    if args.watch and args.export_format:
+        parser.error("--export cannot be combined with --watch")
+    config = config_from_args(args, defaults)
+    if args.save_settings:
+        save_profile(config, args.save_settings)
+        print(f'Settings have been saved to {args.save_settings} ({config.settings_hash()[:12]})!')
+
+    manifest = Manifest(config.output_folder, args.check_content) if args.incremental else None
+
+    log_file = None
+    logger = None
+    if args.log_json:
+        log_file = sys.stdout if args.log_json == '-' else open(args.log_json, 'w', encoding='utf-8')
+        logger = JsonLogger(log_file)
+
+    exporter = None
+
+    def on_result(result):
+        if logger is not None:
+            logger.log_result(result)
+        if exporter is not None:
+            exporter.add(result)
+        if args.log_json != '-':
+            print_result(result)
+
+    if args.watch:
+        print(f'Watching {config.input_folder} for new or changed workbooks, press Ctrl+C to stop.')
+        try:
+            watch_folder(config, args.workers, on_result, args.check_content, args.poll, args.settle)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if log_file is not None and log_file is not sys.stdout:
+                log_file.close()
+        return 0
+
+    if config.export_format:
+        if manifest is not None:
+            # Skipped workbooks send no curves, so the export would lose them.
+            print('Every workbook is rendered so that the export is complete; --incremental only '
+                  'updates its manifest in this run.', file=sys.stderr)
+        try:
+            exporter = open_export(config.export_format, config.output_folder, find_workbooks(config.input_folder))
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    workers = 1 if args.profile else args.workers
+    start = time.perf_counter()
+    try:
+        with profiled(config.output_folder) if args.profile else nullcontext():
+            if args.report:
+                report_outputs, results = write_report(config, args.report, args.report_name, args.grid,
+                                                       on_result=on_result)
+            else:
+                results = convert_folder_parallel(config, workers=workers, on_result=on_result,
+                                                  manifest=manifest, rebuild=exporter is not None)
+        wall_seconds = time.perf_counter() - start
+        if logger is not None:
+            logger.log_summary(results, wall_seconds)
+    finally:
+        if log_file is not None and log_file is not sys.stdout:
+            log_file.close()
+        export_outputs = exporter.close() if exporter is not None else []
+
+    if args.log_json == '-':
+        return 1 if any(not result.ok for result in results) else 0
+
+    failed = [result for result in results if not result.ok]
+    skipped = [result for result in results if result.skipped]
+    print(f"{len(results) - len(failed)} of {len(results)} graphs have been created and saved!"
+          + (f" ({len(skipped)} already up to date)" if skipped else ""))
+    if args.report:
+        print(f'The report has been saved to {", ".join(report_outputs)}!')
+    if export_outputs:
+        print(f'Curves and statistics have been exported to {", ".join(export_outputs)}!')
+    if args.timings:
+        print(format_summary(summary_record(results, wall_seconds)))
+
+    if args.compare:
+        outputs, errors = compare_workbooks(config, results)
+        for error in errors:
+            print(error, file=sys.stderr)
+        if outputs:
+            print(f'Comparison of series {args.compare} has been saved to {", ".join(outputs)}!')
+        else:
+            print(f'No workbook has a series {args.compare} to compare.', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
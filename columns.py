@@ -0,0 +1,88 @@
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+@dataclass
+class PairingPlan:
+    # Which header row to read, and the (x, y) column indices of every series in it.
+    header_row: int = 1
+    pairs: list = field(default_factory=list)
+    names: list = field(default_factory=list)
+
+    @property
+    def usecols(self):
+        return sorted({idx for pair in self.pairs for idx in pair})
+
+
+def header_text(value):
+    # Headers can be numbers, dates or empty cells, so everything is compared as text.
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value).strip()
+
+
+def column_matcher(pattern):
+    # Returns a function giving the pairing key of a matching header, or None. A plain pattern is
+    # a prefix and the key is the rest of the header, 're:<regex>' must match the whole header and
+    # the key is its first group.
+    if pattern.startswith('re:'):
+        regex = re.compile(pattern[3:])
+
+        def match(text):
+            found = regex.fullmatch(text)
+            if found is None:
+                return None
+            return found.group(1) if regex.groups else ''
+        return match
+
+    def match(text):
+        return text[len(pattern):] if text.startswith(pattern) else None
+    return match
+
+
+def pair_columns(header, x_pattern='X', y_pattern='Y', shared_x=None):
+    # One pass over the header. Without shared_x, every X column is paired with the first Y column
+    # that has the same key, in the order of the X columns. With shared_x (a header name or
+    # 're:<regex>'), the first column matching it is the X of every Y column.
+    match_x = column_matcher(x_pattern)
+    match_y = column_matcher(y_pattern)
+    match_shared = None
+    if shared_x and shared_x.startswith('re:'):
+        shared_regex = re.compile(shared_x[3:])
+        match_shared = lambda text: shared_regex.fullmatch(text) is not None
+    elif shared_x:
+        match_shared = lambda text: text == shared_x
+
+    shared_idx = None
+    x_columns = []
+    y_columns = []
+    y_by_key = {}
+    for idx, value in enumerate(header):
+        text = header_text(value)
+        if text is None:
+            continue
+        if match_shared is not None:
+            if shared_idx is None and match_shared(text):
+                shared_idx = idx
+                continue
+        else:
+            key = match_x(text)
+            if key is not None:
+                x_columns.append((key, idx))
+                continue
+        key = match_y(text)
+        if key is not None:
+            y_columns.append(idx)
+            y_by_key.setdefault(key, idx)
+
+    if match_shared is not None:
+        return [(shared_idx, y_idx) for y_idx in y_columns] if shared_idx is not None else []
+    return [(x_idx, y_by_key[key]) for key, x_idx in x_columns if key in y_by_key]
+
+
+def pairing_plan(header, config):
+    pairs = pair_columns(header, config.x_pattern, config.y_pattern, config.shared_x)[:config.num_series]
+    names = [(header_text(header[x_idx]), header_text(header[y_idx])) for x_idx, y_idx in pairs]
+    return PairingPlan(config.header_row, pairs, names)
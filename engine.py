@@ -0,0 +1,469 @@
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field, fields, replace
+from glob import glob
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
+
+from instrument import Timings, stage
+from readers import SheetReadError, is_sheet_pattern, read_sheets
+from smoothing import pixel_envelope, smooth_series
+from style import graph_font, resolve_weight
+
+DEFAULT_COLORS = ['red', 'blue', 'green', 'purple', 'orange', 'brown', 'pink', 'gray', 'olive', 'cyan',
+                  'darkred', 'navy', 'lime', 'magenta', 'gold', 'teal', 'violet', 'coral', 'darkgreen', 'skyblue']
+DEFAULT_MARKERS = ['o', 's', '^', 'v', 'D', 'p', '*', 'h', '+', 'x', '>', '<', '1', '2', '3', '4', '8', 'P', 'X', 'd']
+AVAILABLE_FONTS = ["Times New Roman", "Arial", "Helvetica", "Calibri", "Cambria", "Georgia"]
+LEGEND_POSITIONS = ['upper right', 'upper left', 'lower left', 'lower right',
+                    'right', 'center left', 'center right', 'lower center',
+                    'upper center', 'center']
+
+# Raster formats are encoded with Pillow from a single Agg draw; vector formats need their own render.
+RASTER_FORMATS = {'png': 'PNG', 'webp': 'WEBP', 'jpg': 'JPEG', 'jpeg': 'JPEG'}
+VECTOR_FORMATS = ('svg', 'pdf')
+OUTPUT_FORMATS = list(RASTER_FORMATS) + list(VECTOR_FORMATS)
+
+# From this many series on, all curves are drawn as one LineCollection instead of one artist each.
+COLLECTION_SERIES = 8
+# Artists with more vertices than this are embedded as an image in SVG/PDF output.
+RASTERIZE_POINTS = 20000
+
+# Fields that change how workbooks are read, not how the graphs look.
+NON_RENDER_FIELDS = ('input_folder', 'output_folder', 'reader', 'cache_folder', 'export_format', 'compare_series')
+
+
+@dataclass
+class GraphConfig:
+    input_folder: str = "./excel"
+    output_folder: str = "./graph"
+    sheet_name: str = "Sheet1"
+    num_series: int = 1
+    header_row: int = 1
+    x_pattern: str = "X"
+    y_pattern: str = "Y"
+    shared_x: str = None
+    x_label: str = "ε"
+    y_label: str = "σ"
+    legend_position: str = "upper left"
+    show_legend: bool = True
+    show_symbols: bool = True
+    graph_font: str = "Times New Roman"
+    font_fallbacks: list = field(default_factory=list)
+    series_colors: list = field(default_factory=list)
+    series_markers: list = field(default_factory=list)
+    series_names: list = field(default_factory=list)
+    fixed_layout: bool = False
+    formats: list = field(default_factory=lambda: ['png'])
+    width: float = 12
+    height: float = 8
+    dpi: int = 300
+    png_compression: int = 6
+    quality: int = 90
+    smoothing: str = "spline"
+    decimate_threshold: int = 20000
+    reader: str = "auto"
+    cache_folder: str = None
+    export_format: str = None
+    compare_series: int = None
+
+    def color(self, idx):
+        colors = self.series_colors or DEFAULT_COLORS
+        return colors[idx % len(colors)]
+
+    def marker(self, idx):
+        markers = self.series_markers or DEFAULT_MARKERS
+        return markers[idx % len(markers)]
+
+    def series_label(self, idx):
+        return self.series_names[idx] if idx < len(self.series_names) else f'Series {idx+1}'
+
+    def settings_hash(self):
+        settings = asdict(self)
+        for name in NON_RENDER_FIELDS:
+            del settings[name]
+        # 12 and 12.0 are the same width, whether it came from the CLI or from a settings file.
+        for f in fields(self):
+            if f.type is float and f.name in settings:
+                settings[f.name] = float(settings[f.name])
+        encoded = json.dumps(settings, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class FileResult:
+    filepath: str
+    filename: str
+    output: str = None
+    error: str = None
+    skipped: bool = False
+    outputs: list = field(default_factory=list)
+    timings: dict = field(default_factory=dict)
+    rows: int = 0
+    series: int = 0
+    curves: list = field(default_factory=list)
+    compared: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def find_workbooks(input_folder):
+    workbooks = []
+    for filepath in sorted(glob(os.path.join(input_folder, '*.xlsx'))):
+        if os.path.basename(filepath).startswith('~'):
+            continue
+        workbooks.append(filepath)
+    return workbooks
+
+
+def workbook_name(filepath):
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+
+def output_base(filepath, config, sheet_name=None):
+    if sheet_name is None:
+        return os.path.join(config.output_folder, workbook_name(filepath))
+    sheet_name = re.sub(r'[<>:"/\\|?*]', '_', sheet_name)
+    return os.path.join(config.output_folder, f'{workbook_name(filepath)} - {sheet_name}')
+
+
+def rendered_image(fig, config):
+    # Draws the figure once and returns it as a Pillow image, cropped the way bbox_inches='tight'
+    # would crop it. Returns None when the tight box reaches outside the canvas and savefig must
+    # grow the canvas instead.
+    from PIL import Image
+
+    fig.canvas.draw()
+    width, height = fig.canvas.get_width_height()
+    image = Image.frombuffer('RGBA', (width, height), fig.canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1).copy()
+    if config.fixed_layout:
+        return image
+
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(rcParams['savefig.pad_inches'])
+    left = math.floor(bbox.x0 * fig.dpi)
+    right = math.ceil(bbox.x1 * fig.dpi)
+    top = height - math.ceil(bbox.y1 * fig.dpi)
+    bottom = height - math.floor(bbox.y0 * fig.dpi)
+    if left < 0 or top < 0 or right > width or bottom > height:
+        return None
+    return image.crop((left, top, right, bottom))
+
+
+def save_figure(fig, base_path, config):
+    bbox_inches = None if config.fixed_layout else 'tight'
+    paths = []
+    image = None
+    for fmt in config.formats:
+        path = f'{base_path}.{fmt}'
+        if fmt in RASTER_FORMATS:
+            if image is None:
+                image = rendered_image(fig, config)
+            if image is None:
+                fig.savefig(path, format=fmt, dpi=config.dpi, bbox_inches=bbox_inches,
+                            pil_kwargs=pil_options(fmt, config))
+            else:
+                encode_image(image, path, fmt, config)
+        else:
+            fig.savefig(path, format=fmt, dpi=config.dpi, bbox_inches=bbox_inches)
+        paths.append(path)
+    return paths
+
+
+def pil_options(fmt, config):
+    if fmt == 'png':
+        return {'compress_level': config.png_compression}
+    return {'quality': config.quality}
+
+
+def encode_image(image, path, fmt, config):
+    if RASTER_FORMATS[fmt] == 'JPEG':
+        image = image.convert('RGB')
+    image.save(path, format=RASTER_FORMATS[fmt], dpi=(config.dpi, config.dpi), **pil_options(fmt, config))
+
+
+class FigureTemplate:
+    def __init__(self, config):
+        self.config = config
+        self.settings_hash = config.settings_hash()
+
+        self.fig = Figure(figsize=(config.width, config.height), dpi=config.dpi, facecolor='white')
+        FigureCanvasAgg(self.fig)
+        self.ax = ax = self.fig.add_subplot(111, facecolor='white')
+
+        self.fig.subplots_adjust(left=0.12, right=0.95, top=0.95, bottom=0.12)
+
+        self.font = font = graph_font(config)
+        bold = resolve_weight(font, 'bold')
+        ax.set_xlabel(config.x_label, fontsize=12, fontweight=bold, fontname=font)
+        ax.set_ylabel(config.y_label, fontsize=12, fontweight=bold, fontname=font)
+        ax.set_title('', fontsize=14, fontweight=resolve_weight(font, 'semibold'), fontname=font)
+
+        ax.tick_params(axis='both', which='major', labelsize=10, width=1)
+        ax.grid(True, which='major', linestyle='--', linewidth=0.5, alpha=0.7, color='gray')
+
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_linewidth(1)
+        ax.spines['bottom'].set_linewidth(1)
+
+        self.collection = None
+        if config.num_series >= COLLECTION_SERIES:
+            self.collection = LineCollection([], linewidths=1.5, capstyle=rcParams['lines.solid_capstyle'],
+                                             joinstyle=rcParams['lines.solid_joinstyle'])
+            ax.add_collection(self.collection)
+        # Curves with more points than the figure has pixel columns are drawn as the band between
+        # their per-column extremes, so draw time does not grow with the number of rows.
+        self.columns = max(1, round(config.width * config.dpi))
+        self.bands = PolyCollection([], linewidths=1.5)
+        ax.add_collection(self.bands)
+
+        self.lines = []
+        self.markers = []
+        self.legend_elements = []
+        for idx in range(config.num_series):
+            color = config.color(idx)
+            marker = config.marker(idx)
+
+            line = None
+            if self.collection is None:
+                line, = ax.plot([], [], color=color, linewidth=1.5)
+            markers, = ax.plot([], [], marker=marker, color=color, markersize=6, linestyle='none')
+            self.lines.append(line)
+            self.markers.append(markers)
+
+            self.legend_elements.append(Line2D([0], [0],
+                                               marker=marker if config.show_symbols else None,
+                                               color=color,
+                                               label=config.series_label(idx),
+                                               markerfacecolor=color,
+                                               markersize=6,
+                                               linewidth=1.5))
+        self.legend_count = None
+        self.curves = []
+
+    def set_legend(self, count):
+        self.ax.legend(handles=self.legend_elements[:count],
+                       title='Data Series',
+                       loc=self.config.legend_position,
+                       fontsize=10,
+                       frameon=True,
+                       framealpha=0.8,
+                       prop={'family': self.font})
+        self.legend_count = count
+
+    def update(self, title, series, timings=None):
+        with stage(timings, 'draw'):
+            return self.update_artists(title, series, timings)
+
+    def update_artists(self, title, series, timings):
+        # set_title would reset the title to the rcParams style, so only its text is replaced.
+        self.ax.title.set_text(title)
+        smooth_start = time.perf_counter()
+        self.curves = []
+        segments = []
+        segment_colors = []
+        bands = []
+        band_colors = []
+
+        for idx, (line, markers) in enumerate(zip(self.lines, self.markers)):
+            if idx >= len(series):
+                if line is not None:
+                    line.set_data([], [])
+                    line.set_visible(False)
+                markers.set_data([], [])
+                markers.set_visible(False)
+                continue
+
+            x, y, x_line, y_line = smooth_series(*series[idx], self.config.smoothing,
+                                                 self.config.decimate_threshold)
+            self.curves.append((idx, x_line, y_line))
+            if len(x_line) > 2 * self.columns and x_line[-1] > x_line[0]:
+                bands.append(pixel_envelope(x_line, y_line, self.columns))
+                band_colors.append(self.config.color(idx))
+                if line is not None:
+                    line.set_visible(False)
+            elif line is None:
+                segments.append(np.column_stack((x_line, y_line)))
+                segment_colors.append(self.config.color(idx))
+            else:
+                line.set_data(x_line, y_line)
+                line.set_visible(True)
+
+            if self.config.show_symbols:
+                marker_interval = max(1, len(x) // 50)
+                markers.set_data(x[::marker_interval], y[::marker_interval])
+            markers.set_visible(self.config.show_symbols)
+
+        if timings is not None:
+            smooth_seconds = time.perf_counter() - smooth_start
+            timings.stages['smooth'] = timings.stages.get('smooth', 0.0) + smooth_seconds
+            timings.exclude('draw', smooth_seconds)
+
+        self.ax.relim(visible_only=True)
+        # relim only looks at lines, so the extent of the collections is added by hand.
+        extents = []
+        for collection, paths, colors in ((self.collection, segments, segment_colors),
+                                          (self.bands, bands, band_colors)):
+            if collection is None:
+                continue
+            collection.set_verts(paths)
+            collection.set_color(colors)
+            collection.set_rasterized(sum(len(path) for path in paths) > RASTERIZE_POINTS)
+            extents += [bound for path in paths if len(path) for bound in (path.min(axis=0), path.max(axis=0))]
+        if extents:
+            self.ax.update_datalim(extents)
+        self.ax.autoscale_view()
+
+        count = min(len(series), len(self.lines))
+        if self.config.show_legend and count != self.legend_count:
+            self.set_legend(count)
+
+        if not self.config.fixed_layout:
+            self.fig.tight_layout()
+        return self.fig
+
+
+_template = None
+
+
+def figure_template(config):
+    global _template
+    if _template is None or _template.settings_hash != config.settings_hash():
+        _template = FigureTemplate(config)
+    return _template
+
+
+def draw_figure(title, series, config, timings=None):
+    return figure_template(config).update(title, series, timings)
+
+
+def compared_sheet(sheet_name, series, config):
+    # The (sheet, x, y) entries of a sheet for the comparison figure, empty when it has too few series.
+    if config.compare_series and config.compare_series <= len(series):
+        return [(sheet_name, *series[config.compare_series - 1])]
+    return []
+
+
+def iter_figures(filepath, config, timings=None, curves=None, compared=None):
+    # Yields (output base path, figure) for every graph of a workbook. The figure is the shared
+    # template, so it must be saved before the next one is requested. The drawn curves are added
+    # to curves as (sheet, series name, x, y), and the series config.compare_series of every sheet
+    # to compared as (sheet, x, y), when a list is given.
+    name = workbook_name(filepath)
+    pattern = is_sheet_pattern(config.sheet_name)
+    sheets = read_sheets(filepath, config)
+
+    found = False
+    while True:
+        with stage(timings, 'read'):
+            sheet = next(sheets, None)
+        if sheet is None:
+            break
+        sheet_name, series = sheet
+        found = True
+        if timings is not None:
+            timings.series += len(series)
+            timings.rows += sum(len(x) for x, _ in series)
+        if compared is not None:
+            compared += compared_sheet(sheet_name, series, config)
+
+        fig = draw_figure(f'{name} - {sheet_name}' if pattern else name, series, config, timings)
+        if curves is not None:
+            curves += [(sheet_name, config.series_label(idx), x_line, y_line)
+                       for idx, x_line, y_line in figure_template(config).curves]
+        yield output_base(filepath, config, sheet_name if pattern else None), fig
+
+    if not found:
+        raise SheetReadError(f"No sheet matching '{config.sheet_name}' in {name} has X/Y columns.")
+
+
+def render_workbook(filepath, config, timings=None, curves=None, compared=None):
+    outputs = []
+    for base_path, fig in iter_figures(filepath, config, timings, curves, compared):
+        with stage(timings, 'save'):
+            outputs += save_figure(fig, base_path, config)
+    return outputs
+
+
+def compare_workbooks(config, results, name='comparison'):
+    # Overlays series number config.compare_series of every workbook on one figure, one line per
+    # workbook, or per workbook and sheet when the sheet name is a pattern. The series were kept
+    # while the workbooks were rendered, only the ones skipped as up to date are read here.
+    # Returns the saved paths and the errors of the workbooks that could not be read.
+    pattern = is_sheet_pattern(config.sheet_name)
+    names = []
+    series = []
+    errors = []
+    for result in results:
+        compared = result.compared
+        if result.skipped:
+            try:
+                compared = [entry for sheet_name, sheet_series in read_sheets(result.filepath, config)
+                            for entry in compared_sheet(sheet_name, sheet_series, config)]
+            except SheetReadError as e:
+                errors.append(str(e))
+                continue
+            except Exception as e:
+                errors.append(f"Error reading {result.filename}: {e}")
+                continue
+        for sheet_name, x, y in compared:
+            names.append(f'{result.filename} - {sheet_name}' if pattern else result.filename)
+            series.append((x, y))
+    if not series:
+        return [], errors
+
+    compare_config = replace(config, num_series=len(series), series_names=names)
+    fig = draw_figure(config.series_label(config.compare_series - 1), series, compare_config)
+
+    os.makedirs(config.output_folder, exist_ok=True)
+    return save_figure(fig, os.path.join(config.output_folder, name), compare_config), errors
+
+
+def convert_file(filepath, config, render=render_workbook):
+    result = FileResult(filepath, workbook_name(filepath))
+    timings = Timings()
+    # The curves are only sent back from the workers when they are exported.
+    curves = [] if config.export_format else None
+    compared = [] if config.compare_series else None
+    try:
+        result.outputs = render(filepath, config, timings, curves, compared)
+        result.output = result.outputs[0] if result.outputs else None
+        result.curves = curves or []
+        result.compared = compared or []
+    except SheetReadError as e:
+        result.error = str(e)
+    except Exception as e:
+        result.error = f"Error processing {result.filename}: {e}"
+    result.timings = timings.stages
+    result.rows = timings.rows
+    result.series = timings.series
+    return result
+
+
+def iter_convert(config, filepaths=None, cancel_event=None):
+    if filepaths is None:
+        filepaths = find_workbooks(config.input_folder)
+    os.makedirs(config.output_folder, exist_ok=True)
+    for filepath in filepaths:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        yield convert_file(filepath, config)
+
+
+def convert_folder(config, on_result=None):
+    results = []
+    for result in iter_convert(config):
+        if on_result is not None:
+            on_result(result)
+        results.append(result)
+    return results
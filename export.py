@@ -0,0 +1,129 @@
+import csv
+import os
+
+import numpy as np
+
+EXPORT_FORMATS = ('csv', 'parquet')
+EXPORT_NAME = "excel2graph"
+CURVE_COLUMNS = ['workbook', 'sheet', 'series', 'x', 'y']
+STATS_COLUMNS = ['workbook', 'sheet', 'series', 'points', 'x_min', 'x_max', 'y_min', 'y_max', 'peak_x', 'area']
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def curve_stats(x, y):
+    # Statistics of the curve as drawn: its extent, the x of its highest point and the area under it.
+    if len(x) == 0:
+        return {'points': 0, 'x_min': np.nan, 'x_max': np.nan, 'y_min': np.nan, 'y_max': np.nan,
+                'peak_x': np.nan, 'area': np.nan}
+    peak = int(np.argmax(y))
+    area = float(np.sum((x[1:] - x[:-1]) * (y[1:] + y[:-1])) / 2) if len(x) > 1 else 0.0
+    return {'points': len(x), 'x_min': float(x[0]), 'x_max': float(x[-1]),
+            'y_min': float(y.min()), 'y_max': float(y[peak]), 'peak_x': float(x[peak]), 'area': area}
+
+
+def stats_rows(result):
+    for sheet_name, series_name, x, y in result.curves:
+        yield {'workbook': result.filename, 'sheet': sheet_name, 'series': series_name, **curve_stats(x, y)}
+
+
+class CsvExport:
+    def __init__(self, output_folder, name=EXPORT_NAME):
+        base_path = os.path.join(output_folder, name)
+        self.paths = [f'{base_path}-curves.csv', f'{base_path}-stats.csv']
+        self.files = [open(path, 'w', encoding='utf-8', newline='') for path in self.paths]
+        self.curves = csv.writer(self.files[0])
+        self.curves.writerow(CURVE_COLUMNS)
+        self.stats = csv.DictWriter(self.files[1], STATS_COLUMNS)
+        self.stats.writeheader()
+
+    def add(self, result):
+        for sheet_name, series_name, x, y in result.curves:
+            count = len(x)
+            self.curves.writerows(zip([result.filename] * count, [sheet_name] * count, [series_name] * count,
+                                      x.tolist(), y.tolist()))
+        self.stats.writerows(stats_rows(result))
+
+    def close(self):
+        for f in self.files:
+            f.close()
+        return self.paths
+
+
+class ParquetExport:
+    def __init__(self, output_folder, name=EXPORT_NAME):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.pq = pq
+        base_path = os.path.join(output_folder, name)
+        self.paths = [f'{base_path}-curves.parquet', f'{base_path}-stats.parquet']
+        self.schema = pa.schema([('workbook', pa.string()), ('sheet', pa.string()), ('series', pa.string()),
+                                 ('x', pa.float64()), ('y', pa.float64())])
+        self.writer = pq.ParquetWriter(self.paths[0], self.schema)
+        self.stats = []
+
+    def add(self, result):
+        # Every workbook/series is written as its own row group as soon as its result arrives.
+        for sheet_name, series_name, x, y in result.curves:
+            count = len(x)
+            table = self.pa.table({'workbook': self.pa.array([result.filename] * count, self.pa.string()),
+                                   'sheet': self.pa.array([sheet_name] * count, self.pa.string()),
+                                   'series': self.pa.array([series_name] * count, self.pa.string()),
+                                   'x': x, 'y': y}, schema=self.schema)
+            self.writer.write_table(table)
+        self.stats += stats_rows(result)
+
+    def close(self):
+        self.writer.close()
+        stats_schema = self.pa.schema([(name, self.pa.string()) for name in STATS_COLUMNS[:3]]
+                                      + [('points', self.pa.int64())]
+                                      + [(name, self.pa.float64()) for name in STATS_COLUMNS[4:]])
+        self.pq.write_table(self.pa.Table.from_pylist(self.stats, schema=stats_schema), self.paths[1])
+        return self.paths
+
+
+class OrderedExport:
+    # Passes results to the export in the order of filepaths, whatever order the workers finish
+    # them in, so the files are the same for every run. Written curves are dropped from the result.
+    def __init__(self, export, filepaths):
+        self.export = export
+        self.position = {filepath: idx for idx, filepath in enumerate(filepaths)}
+        self.pending = {}
+        self.next = 0
+
+    def write(self, result):
+        self.export.add(result)
+        result.curves = []
+
+    def add(self, result):
+        idx = self.position.get(result.filepath)
+        if idx is None:
+            self.write(result)
+            return
+        self.pending[idx] = result
+        while self.next in self.pending:
+            self.write(self.pending.pop(self.next))
+            self.next += 1
+
+    def close(self):
+        # Workbooks that never arrived, such as after Ctrl+C, leave gaps that are skipped here.
+        for idx in sorted(self.pending):
+            self.write(self.pending.pop(idx))
+        return self.export.close()
+
+
+def open_export(kind, output_folder, filepaths=(), name=EXPORT_NAME):
+    os.makedirs(output_folder, exist_ok=True)
+    if kind == 'parquet':
+        if not has_pyarrow():
+            raise RuntimeError("Parquet export needs pyarrow, install it with 'pip install pyarrow'.")
+        return OrderedExport(ParquetExport(output_folder, name), filepaths)
+    return OrderedExport(CsvExport(output_folder, name), filepaths)
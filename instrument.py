@@ -0,0 +1,103 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+
+PROFILE_NAME = "excel2graph-profile"
+
+
+class Timings:
+    def __init__(self):
+        self.stages = {}
+        self.rows = 0
+        self.series = 0
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def exclude(self, name, seconds):
+        # Takes time already booked under a nested stage off its enclosing stage.
+        self.stages[name] = self.stages.get(name, 0.0) - seconds
+
+
+def stage(timings, name):
+    return timings.stage(name) if timings is not None else nullcontext()
+
+
+def result_record(result):
+    return {'event': 'file',
+            'file': result.filename,
+            'ok': result.ok,
+            'skipped': result.skipped,
+            'error': result.error,
+            'outputs': result.outputs,
+            'rows': result.rows,
+            'series': result.series,
+            'seconds': {name: round(value, 6) for name, value in result.timings.items()}}
+
+
+def summary_record(results, wall_seconds):
+    stages = {}
+    for result in results:
+        for name, value in result.timings.items():
+            stages[name] = stages.get(name, 0.0) + value
+    rendered = [result for result in results if result.ok and not result.skipped]
+    return {'event': 'summary',
+            'files': len(results),
+            'rendered': len(rendered),
+            'skipped': sum(result.skipped for result in results),
+            'failed': sum(not result.ok for result in results),
+            'rows': sum(result.rows for result in results),
+            'series': sum(result.series for result in results),
+            'wall_seconds': round(wall_seconds, 6),
+            'files_per_second': round(len(rendered) / wall_seconds, 4) if wall_seconds else None,
+            'stage_seconds': {name: round(value, 6) for name, value in stages.items()}}
+
+
+class JsonLogger:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def log_result(self, result):
+        self.write(result_record(result))
+
+    def log_summary(self, results, wall_seconds):
+        self.write(summary_record(results, wall_seconds))
+
+
+def format_summary(record):
+    lines = [f"{record['rendered']} rendered, {record['skipped']} skipped, {record['failed']} failed "
+             f"in {record['wall_seconds']:.2f}s"]
+    total = sum(record['stage_seconds'].values()) or 1.0
+    for name, seconds in sorted(record['stage_seconds'].items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<8} {seconds:9.3f}s  {100 * seconds / total:5.1f}%")
+    return '\n'.join(lines)
+
+
+@contextmanager
+def profiled(output_folder):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(output_folder, exist_ok=True)
+        path = os.path.join(output_folder, PROFILE_NAME)
+        profiler.dump_stats(path + '.prof')
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(40)
+        with open(path + '.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
@@ -1,20 +1,30 @@
 import os
-import pandas as pd
+import queue
+import threading
+import time
 import matplotlib.pyplot as plt
-from glob import glob
 import numpy as np
-from scipy import interpolate
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, simpledialog
 from matplotlib.lines import Line2D
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import webbrowser
+from dataclasses import replace
+
+from engine import (GraphConfig, DEFAULT_COLORS, DEFAULT_MARKERS, AVAILABLE_FONTS, LEGEND_POSITIONS,
+                    find_workbooks, iter_convert)
+from manifest import Manifest, record_result, split_stale
+from preview_data import SeriesCache, load_preview_series, preview_key
+from profiles import load_profile, save_profile
+from smoothing import smooth_series
+from style import resolve_font
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("dark-blue")
 
 FRAME_COLOR = "#2b2b2b"
 INNER_FRAME_COLOR = "#232323"
+SAMPLE_DATA = "Sample data"
 
 root = ctk.CTk()
 root.title("Excel 2 Graph")
@@ -31,9 +41,8 @@ legend_position = ctk.StringVar(value="upper left")
 
 series_colors = []
 series_markers = []
-default_colors = ['red', 'blue', 'green', 'purple', 'orange', 'brown', 'pink', 'gray', 'olive', 'cyan', 
-                 'darkred', 'navy', 'lime', 'magenta', 'gold', 'teal', 'violet', 'coral', 'darkgreen', 'skyblue']
-default_markers = ['o', 's', '^', 'v', 'D', 'p', '*', 'h', '+', 'x', '>', '<', '1', '2', '3', '4', '8', 'P', 'X', 'd']
+default_colors = DEFAULT_COLORS
+default_markers = DEFAULT_MARKERS
 
 os.makedirs("./excel", exist_ok=True)
 os.makedirs("./graph", exist_ok=True)
@@ -42,11 +51,16 @@ series_names = []
 
 show_legend = ctk.BooleanVar(value=True)
 show_symbols = ctk.BooleanVar(value=True)
+skip_unchanged = ctk.BooleanVar(value=False)
 
 graph_font = ctk.StringVar(value="Times New Roman")
-available_fonts = ["Times New Roman", "Arial", "Helvetica", "Calibri", "Cambria", "Georgia"]
+available_fonts = AVAILABLE_FONTS
 
 sheet_name = ctk.StringVar(value="Sheet1")
+preview_file = ctk.StringVar(value=SAMPLE_DATA)
+
+# Settings without a widget (formats, size, smoothing...) come from the last loaded settings file.
+base_config = GraphConfig()
 
 def select_input_folder():
     folder = filedialog.askdirectory()
@@ -58,78 +72,187 @@ def select_output_folder():
     if folder:
         output_folder.set(folder)
 
-def update_preview():
+preview = {"fig": None, "ax": None, "canvas": None, "lines": [], "markers": [], "pending": None,
+           "loading": set(), "errors": {}}
+preview_cache = SeriesCache()
+preview_queue = queue.Queue()
+
+def preview_curve(i, x):
+    if i == 0:
+        return np.sin(x)
+    elif i == 1:
+        return np.cos(x)
+    elif i == 2:
+        return x * 0.1
+    return np.sin(x + i * np.pi/4)
+
+def sample_preview_curves():
+    x = np.linspace(0, 10, 100)
+    curves = []
+    for i in range(num_series.get()):
+        y = preview_curve(i, x)
+        curves.append((x, y, x[::10], y[::10]))
+    return curves
+
+def poll_preview():
     try:
-        for widget in preview_frame.winfo_children():
-            widget.destroy()
-        
-        frame_width = preview_frame.winfo_width()
-        frame_height = preview_frame.winfo_height()
-        
-        preview_width = max(300, frame_width - 40)
-        preview_height = max(200, frame_height - 40)
-        
-        dpi = 100
-        
-        fig_width = preview_width / dpi
-        fig_height = preview_height / dpi
-        
-        fig = plt.Figure(figsize=(fig_width, fig_height), dpi=dpi)
-        ax = fig.add_subplot(111)
-        
-        x = np.linspace(0, 10, 100)
+        while True:
+            key, error = preview_queue.get_nowait()
+            preview["loading"].discard(key)
+            if error is not None:
+                preview["errors"][key] = error
+                print(f"Preview load error: {error}")
+            update_preview()
+    except queue.Empty:
+        pass
+    if preview["loading"]:
+        root.after(50, poll_preview)
+
+def load_preview(filepath, config, key):
+    if key in preview["loading"]:
+        return
+    preview["loading"].add(key)
+
+    def work():
+        error = None
+        try:
+            preview_cache.put(key, load_preview_series(filepath, config))
+        except Exception as e:
+            error = str(e)
+        preview_queue.put((key, error))
+
+    threading.Thread(target=work, daemon=True).start()
+    root.after(50, poll_preview)
+
+def preview_curves():
+    name = preview_file.get()
+    if name == SAMPLE_DATA:
+        return 'Preview', sample_preview_curves()
+
+    config = current_config()
+    filepath = os.path.join(config.input_folder, f'{name}.xlsx')
+    try:
+        key = preview_key(filepath, config)
+    except OSError:
+        return 'Preview', sample_preview_curves()
+    if key in preview["errors"]:
+        return f'Could not read {name}', []
+
+    series = preview_cache.get(key)
+    if series is None:
+        load_preview(filepath, config, key)
+        return f'Loading {name}...', []
+
+    curves = []
+    for x, y in series:
+        x, y, x_line, y_line = smooth_series(x, y, config.smoothing, config.decimate_threshold)
+        marker_interval = max(1, len(x) // 50)
+        curves.append((x_line, y_line, x[::marker_interval], y[::marker_interval]))
+    return name, curves
+
+def refresh_preview_files(*args):
+    names = [os.path.splitext(os.path.basename(filepath))[0] for filepath in find_workbooks(input_folder.get())]
+    preview_file_combobox.configure(values=[SAMPLE_DATA] + names)
+    if preview_file.get() not in names:
+        preview_file.set(SAMPLE_DATA)
+    update_preview()
+
+def build_preview():
+    dpi = 100
+    preview_width = max(300, preview_frame.winfo_width() - 40)
+    preview_height = max(200, preview_frame.winfo_height() - 40)
+
+    fig = plt.Figure(figsize=(preview_width / dpi, preview_height / dpi), dpi=dpi)
+    ax = fig.add_subplot(111)
+
+    ax.set_title('Preview', fontsize=12, fontweight='semibold')
+    ax.xaxis.label.set_fontsize(10)
+    ax.xaxis.label.set_fontweight('bold')
+    ax.yaxis.label.set_fontsize(10)
+    ax.yaxis.label.set_fontweight('bold')
+
+    ax.set_facecolor('#2b2b2b')
+    fig.patch.set_facecolor('#2b2b2b')
+    ax.tick_params(colors='white')
+    ax.xaxis.label.set_color('white')
+    ax.yaxis.label.set_color('white')
+    ax.title.set_color('white')
+
+    canvas = FigureCanvasTkAgg(fig, master=preview_frame)
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    preview.update(fig=fig, ax=ax, canvas=canvas)
+
+def sync_preview_artists(count):
+    ax = preview["ax"]
+    lines = preview["lines"]
+    markers = preview["markers"]
+    while len(lines) < count:
+        lines.append(ax.plot([], [])[0])
+        markers.append(ax.plot([], [], linestyle='none')[0])
+    while len(lines) > count:
+        lines.pop().remove()
+        markers.pop().remove()
+
+def draw_preview():
+    preview["pending"] = None
+    try:
+        if preview["canvas"] is None:
+            build_preview()
+        ax = preview["ax"]
+        font = resolve_font(graph_font.get(), tuple(base_config.font_fallbacks))
+
+        title, curves = preview_curves()
         legend_elements = []
-        
-        for i in range(num_series.get()):
-            if i == 0:
-                y = np.sin(x)
-            elif i == 1:
-                y = np.cos(x)
-            elif i == 2:
-                y = x * 0.1
-            else:
-                y = np.sin(x + i * np.pi/4)
-            
+        sync_preview_artists(len(curves))
+
+        for i, (line, markers) in enumerate(zip(preview["lines"], preview["markers"])):
+            x_line, y_line, x_marks, y_marks = curves[i]
+
             color = series_colors[i] if i < len(series_colors) else default_colors[i % len(default_colors)]
             marker = series_markers[i] if i < len(series_markers) else default_markers[i % len(default_markers)]
-            
+
             series_label = series_names[i] if i < len(series_names) else f'Series {i+1}'
-            
-            line = ax.plot(x, y, color=color, label=series_label)
-            
-            if show_symbols.get():
-                ax.scatter(x[::10], y[::10], color=color, marker=marker)
-            
-            legend_elements.append(Line2D([0], [0], color=color, 
+
+            line.set_data(x_line, y_line)
+            line.set_color(color)
+            line.set_label(series_label)
+
+            markers.set_data(x_marks, y_marks)
+            markers.set_color(color)
+            markers.set_marker(marker)
+            markers.set_visible(show_symbols.get())
+
+            legend_elements.append(Line2D([0], [0], color=color,
                                         marker=marker if show_symbols.get() else None,
-                                        label=series_label, 
-                                        markerfacecolor=color, 
+                                        label=series_label,
+                                        markerfacecolor=color,
                                         markersize=8))
-        
-        ax.set_xlabel(x_label.get(), fontsize=10, fontweight='bold', color='darkred', fontname=graph_font.get())
-        ax.set_ylabel(y_label.get(), fontsize=10, fontweight='bold', color='darkred', fontname=graph_font.get())
-        ax.set_title('Preview', fontsize=12, fontweight='semibold', color='navy', fontname=graph_font.get())
-        
-        for label in ax.get_xticklabels() + ax.get_yticklabels():
-            label.set_fontname(graph_font.get())
-        
+
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+
+        ax.set_xlabel(x_label.get(), fontname=font)
+        ax.set_ylabel(y_label.get(), fontname=font)
+        ax.title.set_text(title)
+        ax.title.set_fontname(font)
+        ax.tick_params(labelfontfamily=font)
+
+        legend = ax.get_legend()
+        if legend is not None:
+            legend.remove()
         if legend_elements and show_legend.get():
-            ax.legend(handles=legend_elements, loc=legend_position.get(), fontsize=8, prop={'family': graph_font.get()})
-        
-        ax.set_facecolor('#2b2b2b')
-        fig.patch.set_facecolor('#2b2b2b')
-        ax.tick_params(colors='white')
-        ax.xaxis.label.set_color('white')
-        ax.yaxis.label.set_color('white')
-        ax.title.set_color('white')
-        
-        canvas = FigureCanvasTkAgg(fig, master=preview_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+            ax.legend(handles=legend_elements, loc=legend_position.get(), fontsize=8, prop={'family': font})
+
+        preview["canvas"].draw_idle()
     except Exception as e:
         print(f"Preview update error: {e}")
         pass
 
+def update_preview():
+    # Edits are coalesced into a single redraw once Tk is idle.
+    if preview["pending"] is None:
+        preview["pending"] = root.after_idle(draw_preview)
+
 def create_color_config_frame():
     global series_names
     color_config_frame = ctk.CTkFrame(settings_frame, fg_color=INNER_FRAME_COLOR, corner_radius=8, height=100)
@@ -215,6 +338,139 @@ def create_color_config_frame():
     
     return color_config_frame
 
+def current_config():
+    return replace(base_config,
+                   input_folder=input_folder.get(),
+                   output_folder=output_folder.get(),
+                   sheet_name=sheet_name.get(),
+                   num_series=num_series.get(),
+                   x_label=x_label.get(),
+                   y_label=y_label.get(),
+                   legend_position=legend_position.get(),
+                   show_legend=show_legend.get(),
+                   show_symbols=show_symbols.get(),
+                   graph_font=graph_font.get(),
+                   series_colors=list(series_colors),
+                   series_markers=list(series_markers),
+                   series_names=list(series_names))
+
+def apply_config(config):
+    global base_config
+    base_config = config
+    series_colors[:] = config.series_colors
+    series_markers[:] = config.series_markers
+    series_names[:] = config.series_names
+    input_folder.set(config.input_folder)
+    output_folder.set(config.output_folder)
+    sheet_name.set(config.sheet_name)
+    x_label.set(config.x_label)
+    y_label.set(config.y_label)
+    legend_position.set(config.legend_position)
+    show_legend.set(config.show_legend)
+    show_symbols.set(config.show_symbols)
+    graph_font.set(config.graph_font)
+    num_series.set(config.num_series)
+    update_preview()
+
+def load_settings():
+    path = filedialog.askopenfilename(filetypes=[("Settings", "*.json"), ("All files", "*.*")])
+    if not path:
+        return
+    try:
+        apply_config(load_profile(path))
+    except (OSError, ValueError, TypeError) as e:
+        messagebox.showerror("Load Settings", f"Could not load {path}:\n\n{e}")
+        return
+    status_label.configure(text=f"Settings loaded from {os.path.basename(path)}.")
+
+def save_settings():
+    path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Settings", "*.json")])
+    if not path:
+        return
+    try:
+        save_profile(current_config(), path)
+    except OSError as e:
+        messagebox.showerror("Save Settings", f"Could not save {path}:\n\n{e}")
+        return
+    status_label.configure(text=f"Settings saved to {os.path.basename(path)}.")
+
+batch_queue = queue.Queue()
+cancel_event = threading.Event()
+batch_state = {}
+
+def run_batch(config, filepaths, manifest):
+    try:
+        for result in iter_convert(config, filepaths, cancel_event):
+            if manifest is not None:
+                record_result(manifest, result, config)
+            batch_queue.put(("result", result))
+    except Exception as e:
+        batch_queue.put(("failed", str(e)))
+    finally:
+        if manifest is not None:
+            manifest.save()
+    batch_queue.put(("done", cancel_event.is_set()))
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+def poll_batch():
+    finished = None
+    try:
+        while True:
+            kind, payload = batch_queue.get_nowait()
+            if kind == "result":
+                batch_state["done"] += 1
+                if payload.ok:
+                    print(f'{payload.filename} file has been converted to {payload.output}!')
+                else:
+                    batch_state["errors"].append(payload.error)
+            elif kind == "failed":
+                batch_state["errors"].append(payload)
+            else:
+                finished = payload
+    except queue.Empty:
+        pass
+
+    done = batch_state["done"]
+    total = batch_state["total"]
+    elapsed = max(time.perf_counter() - batch_state["started"], 1e-6)
+    rate = done / elapsed
+    progress_bar.set(done / total if total else 1)
+
+    if finished is None:
+        eta = format_eta((total - done) / rate) if rate else "--:--"
+        status_label.configure(text=f"Processing: {done}/{total} files ({rate:.1f} files/s, ETA {eta})")
+        root.after(100, poll_batch)
+        return
+
+    finish_batch(finished)
+
+def finish_batch(cancelled):
+    done = batch_state["done"]
+    total = batch_state["total"]
+    errors = batch_state["errors"]
+
+    create_button.configure(state="normal")
+    cancel_button.configure(state="disabled")
+
+    if cancelled:
+        status_label.configure(text=f"Cancelled after {done} of {total} files.")
+    elif errors:
+        status_label.configure(text=f"{done - len(errors)} of {total} graphs have been created, {len(errors)} failed.")
+    else:
+        status_label.configure(text="All graphs have been created and saved!")
+
+    if batch_state["skipped"]:
+        status_label.configure(text=status_label.cget("text") + f" ({batch_state['skipped']} already up to date)")
+
+    if errors:
+        shown = "\n".join(errors[:10])
+        if len(errors) > 10:
+            shown += f"\n... and {len(errors) - 10} more"
+        messagebox.showerror("Conversion Errors", f"{len(errors)} file(s) could not be converted:\n\n{shown}")
+
 def create_graphs():
     if not input_folder.get() or not output_folder.get():
         messagebox.showwarning("Missing Folders", "Please select both input and output folders.")
@@ -224,105 +480,31 @@ def create_graphs():
         messagebox.showwarning("Missing Configuration", "Please configure series colors and markers first.")
         return
 
-    os.makedirs(output_folder.get(), exist_ok=True)
+    config = current_config()
+    filepaths = find_workbooks(config.input_folder)
+    manifest = None
+    skipped = []
+    if skip_unchanged.get():
+        manifest = Manifest(config.output_folder)
+        filepaths, skipped = split_stale(filepaths, config, manifest)
 
-    for filepath in glob(os.path.join(input_folder.get(), '*.xlsx')):
-        filename = os.path.splitext(os.path.basename(filepath))[0]
-        
-        if filename.startswith('~'):
-            continue
-        
-        try:
-            data = pd.read_excel(filepath, sheet_name=sheet_name.get())
-        except Exception as e:
-            messagebox.showerror("Sheet Error", f"Error reading sheet '{sheet_name.get()}' from {filename}. Please verify the sheet name.")
-            status_label.configure(text=f"Error processing {filename}: Invalid sheet name")
-            continue
-        
-        x_columns = [col for col in data.columns if col.startswith('X')]
-        y_columns = [col for col in data.columns if col.startswith('Y')]
-        xy_pairs = [(x, y) for x in x_columns for y in y_columns if x[1:] == y[1:]]
-        
-        plt.figure(figsize=(12, 8), dpi=300)
-        
-        plt.rcParams['figure.facecolor'] = 'white'
-        plt.rcParams['axes.facecolor'] = 'white'
-        
-        plt.subplots_adjust(left=0.12, right=0.95, top=0.95, bottom=0.12)
-        
-        plt.xlabel(x_label.get(), fontsize=12, fontweight='bold', fontname=graph_font.get())
-        plt.ylabel(y_label.get(), fontsize=12, fontweight='bold', fontname=graph_font.get())
-        plt.title(f'{filename}', fontsize=14, fontweight='semibold', fontname=graph_font.get())
-        
-        plt.tick_params(axis='both', which='major', labelsize=10, width=1)
-        plt.grid(True, which='major', linestyle='--', linewidth=0.5, alpha=0.7, color='gray')
-        
-        ax = plt.gca()
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_linewidth(1)
-        ax.spines['bottom'].set_linewidth(1)
-        
-        legend_elements = []
-        
-        for idx, (x_col, y_col) in enumerate(xy_pairs[:num_series.get()]):
-            x = data[x_col].to_numpy()
-            y = data[y_col].to_numpy()
-            
-            color = series_colors[idx % len(series_colors)]
-            marker = series_markers[idx % len(series_markers)]
-            
-            series_label = series_names[idx] if idx < len(series_names) else f'Series {idx+1}'
-            
-            try:
-                sort_idx = np.argsort(x)
-                x = x[sort_idx]
-                y = y[sort_idx]
-                
-                if len(np.unique(x)) > 3:
-                    tck = interpolate.splrep(x, y, s=0)
-                    x_smooth = np.linspace(min(x), max(x), 1000)
-                    y_smooth = interpolate.splev(x_smooth, tck)
-                    plt.plot(x_smooth, y_smooth, color=color, linewidth=1.5)
-                else:
-                    plt.plot(x, y, color=color, linewidth=1.5)
-            except:
-                plt.plot(x, y, color=color, linewidth=1.5)
-            
-            if show_symbols.get():
-                marker_interval = max(1, len(x) // 50)
-                plt.plot(x[::marker_interval], y[::marker_interval], 
-                        marker=marker, color=color, 
-                        markersize=6, linestyle='none')
-            
-            legend_elements.append(Line2D([0], [0], 
-                                        marker=marker if show_symbols.get() else None, 
-                                        color=color, 
-                                        label=series_label,
-                                        markerfacecolor=color, 
-                                        markersize=6,
-                                        linewidth=1.5))
-        
-        if show_legend.get():
-            plt.legend(handles=legend_elements, 
-                      title='Data Series', 
-                      loc=legend_position.get(), 
-                      fontsize=10, 
-                      frameon=True, 
-                      framealpha=0.8,
-                      prop={'family': graph_font.get()})
-        
-        plt.tight_layout()
-        
-        output_filepath = os.path.join(output_folder.get(), f'{filename}.png')
-        plt.savefig(output_filepath, format='png', dpi=300, bbox_inches='tight')
-        plt.close()
+    while not batch_queue.empty():
+        batch_queue.get_nowait()
+    cancel_event.clear()
+    batch_state.update(done=0, total=len(filepaths), skipped=len(skipped), errors=[], started=time.perf_counter())
 
-        print(f'{filename} file has been converted to {output_filepath}!')
-        status_label.configure(text=f'Processing: {filename}')
-        root.update()
-        
-    status_label.configure(text="All graphs have been created and saved!")
+    create_button.configure(state="disabled")
+    cancel_button.configure(state="normal")
+    progress_bar.set(0)
+    status_label.configure(text=f"Processing: 0/{len(filepaths)} files")
+
+    threading.Thread(target=run_batch, args=(config, filepaths, manifest), daemon=True).start()
+    root.after(100, poll_batch)
+
+def cancel_graphs():
+    cancel_event.set()
+    cancel_button.configure(state="disabled")
+    status_label.configure(text="Cancelling after the current file...")
 
 def create_series_slider():
     slider_frame = ctk.CTkFrame(series_frame, fg_color="transparent")
@@ -344,7 +526,12 @@ def create_series_slider():
         num_series.set(int(value))
         update_preview()
     
+    def sync_slider(*args):
+        slider.set(num_series.get())
+        value_label.configure(text=str(num_series.get()))
+    
     slider.configure(command=update_label)
+    num_series.trace_add("write", sync_slider)
 
 main_container = ctk.CTkFrame(root, fg_color="transparent")
 main_container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -410,9 +597,7 @@ legend_frame = ctk.CTkFrame(settings_frame, fg_color=INNER_FRAME_COLOR, corner_r
 legend_frame.pack(fill="x", padx=10, pady=(5, 10))
 ctk.CTkLabel(legend_frame, text="Legend Position:").pack(side="left", padx=10)
 legend_combobox = ctk.CTkComboBox(legend_frame, 
-                                 values=['upper right', 'upper left', 'lower left', 'lower right',
-                                        'right', 'center left', 'center right', 'lower center',
-                                        'upper center', 'center'],
+                                 values=LEGEND_POSITIONS,
                                  variable=legend_position,
                                  width=200)
 legend_combobox.pack(side="left", padx=10)
@@ -432,6 +617,11 @@ symbols_switch = ctk.CTkSwitch(visibility_frame,
                              command=update_preview)
 symbols_switch.pack(side="left", padx=10)
 
+skip_switch = ctk.CTkSwitch(visibility_frame,
+                            text="Skip Unchanged",
+                            variable=skip_unchanged)
+skip_switch.pack(side="left", padx=10)
+
 font_frame = ctk.CTkFrame(settings_frame, fg_color=INNER_FRAME_COLOR, corner_radius=8)
 font_frame.pack(fill="x", padx=10, pady=(5, 10))
 
@@ -453,7 +643,22 @@ create_button = ctk.CTkButton(action_frame,
                              fg_color="#2ecc71",
                              hover_color="#27ae60",
                              corner_radius=8)
-create_button.pack(pady=10, padx=10)
+create_button.pack(side="left", expand=True, pady=10, padx=10)
+
+cancel_button = ctk.CTkButton(action_frame,
+                             text="Cancel",
+                             command=cancel_graphs,
+                             height=40,
+                             state="disabled",
+                             fg_color="#e74c3c",
+                             hover_color="#c0392b",
+                             corner_radius=8)
+cancel_button.pack(side="left", expand=True, pady=10, padx=10)
+
+ctk.CTkButton(action_frame, text="Load Settings", command=load_settings, height=40,
+              corner_radius=8).pack(side="left", expand=True, pady=10, padx=10)
+ctk.CTkButton(action_frame, text="Save Settings", command=save_settings, height=40,
+              corner_radius=8).pack(side="left", expand=True, pady=10, padx=10)
 
 status_frame = ctk.CTkFrame(left_frame, fg_color=FRAME_COLOR, corner_radius=10)
 status_frame.pack(fill="x", padx=20, pady=10)
@@ -461,15 +666,30 @@ status_label = ctk.CTkLabel(status_frame,
                            text="Ready to process...", 
                            font=("Arial", 12),
                            text_color="#3498db")
-status_label.pack(pady=10)
+status_label.pack(pady=(10, 5))
+
+progress_bar = ctk.CTkProgressBar(status_frame)
+progress_bar.set(0)
+progress_bar.pack(fill="x", padx=15, pady=(0, 10))
 
 preview_label = ctk.CTkLabel(right_frame, text="Graph Preview", font=("Arial", 16, "bold"), text_color="#3498db")
 preview_label.pack(pady=10)
 
+preview_file_frame = ctk.CTkFrame(right_frame, fg_color=INNER_FRAME_COLOR, corner_radius=8)
+preview_file_frame.pack(fill="x", padx=10, pady=(0, 5))
+ctk.CTkLabel(preview_file_frame, text="Preview Data:").pack(side="left", padx=10)
+preview_file_combobox = ctk.CTkComboBox(preview_file_frame,
+                                        values=[SAMPLE_DATA],
+                                        variable=preview_file,
+                                        width=200,
+                                        command=lambda _: update_preview())
+preview_file_combobox.pack(side="left", padx=10)
+ctk.CTkButton(preview_file_frame, text="↻", width=30, command=refresh_preview_files).pack(side="left")
+
 preview_frame = ctk.CTkFrame(right_frame, fg_color=INNER_FRAME_COLOR, corner_radius=8)
 preview_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-update_preview()
+refresh_preview_files()
 
 def on_setting_change(*args):
     update_preview()
@@ -478,6 +698,8 @@ x_label.trace_add("write", on_setting_change)
 y_label.trace_add("write", on_setting_change)
 legend_position.trace_add("write", on_setting_change)
 num_series.trace_add("write", on_setting_change)
+sheet_name.trace_add("write", on_setting_change)
+input_folder.trace_add("write", refresh_preview_files)
 
 legend_combobox.configure(command=lambda _: update_preview())
 
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+
+from engine import FileResult, workbook_name
+
+MANIFEST_NAME = ".excel2graph-manifest.json"
+MANIFEST_VERSION = 2
+
+
+def file_digest(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, output_folder, check_content=False):
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.check_content = check_content
+        self.entries = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data.get('entries', {})
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def outputs(self, filepath):
+        return self.entries[os.path.basename(filepath)]['outputs']
+
+    def is_current(self, filepath, settings_hash):
+        entry = self.entries.get(os.path.basename(filepath))
+        if entry is None or entry['settings'] != settings_hash:
+            return False
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+        if not all(os.path.exists(output) for output in entry['outputs']):
+            return False
+        if entry['size'] != stat.st_size:
+            return False
+        if entry['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        if not self.check_content or file_digest(filepath) != entry.get('sha256'):
+            return False
+        entry['mtime_ns'] = stat.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def record(self, filepath, settings_hash, outputs):
+        stat = os.stat(filepath)
+        entry = {'size': stat.st_size,
+                 'mtime_ns': stat.st_mtime_ns,
+                 'settings': settings_hash,
+                 'outputs': list(outputs)}
+        if self.check_content:
+            entry['sha256'] = file_digest(filepath)
+        self.entries[os.path.basename(filepath)] = entry
+        self.dirty = True
+
+    def forget(self, filepath):
+        if self.entries.pop(os.path.basename(filepath), None) is not None:
+            self.dirty = True
+
+
+def split_stale(filepaths, config, manifest):
+    settings_hash = config.settings_hash()
+    stale = []
+    skipped = []
+    for filepath in filepaths:
+        if manifest.is_current(filepath, settings_hash):
+            outputs = manifest.outputs(filepath)
+            skipped.append(FileResult(filepath, workbook_name(filepath), output=outputs[0], skipped=True,
+                                      outputs=outputs))
+        else:
+            stale.append(filepath)
+    return stale, skipped
+
+
+def record_result(manifest, result, config):
+    if result.ok and not result.skipped:
+        manifest.record(result.filepath, config.settings_hash(), result.outputs)
+    elif not result.ok:
+        manifest.forget(result.filepath)
@@ -0,0 +1,54 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+
+from readers import read_series
+from smoothing import lttb_decimate, sort_and_merge
+
+PREVIEW_POINTS = 2000
+CACHE_BYTES = 64 * 1024 * 1024
+
+
+class SeriesCache:
+    # Least recently used cache of decimated preview series, bounded by the bytes of its arrays.
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, series):
+        nbytes = sum(x.nbytes + y.nbytes for x, y in series)
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (series, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+
+
+def preview_key(filepath, config):
+    stat = os.stat(filepath)
+    return (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns, config.sheet_name, config.num_series,
+            config.header_row, config.x_pattern, config.y_pattern, config.shared_x)
+
+
+def load_preview_series(filepath, config):
+    # The preview only needs the first matching sheet, without any read cache on disk.
+    series = read_series(filepath, replace(config, cache_folder=None))
+    decimated = []
+    for x, y in series:
+        x, y = sort_and_merge(x, y)
+        decimated.append(lttb_decimate(x, y, PREVIEW_POINTS))
+    return decimated
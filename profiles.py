@@ -0,0 +1,30 @@
+import json
+import os
+from dataclasses import asdict, fields, replace
+
+from engine import GraphConfig
+
+PROFILE_VERSION = 1
+
+
+def save_profile(config, path):
+    data = {'version': PROFILE_VERSION,
+            'settings_hash': config.settings_hash(),
+            'settings': asdict(config)}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def load_profile(path, base=None):
+    # Settings missing from the file keep their value from base, so older profiles still load.
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get('version') != PROFILE_VERSION:
+        raise ValueError(f"{path} is not an Excel2Graph settings file.")
+    names = {f.name for f in fields(GraphConfig)}
+    settings = {name: value for name, value in data.get('settings', {}).items() if name in names}
+    return replace(base or GraphConfig(), **settings)
@@ -0,0 +1,294 @@
+import fnmatch
+import json
+import math
+import os
+import re
+import zipfile
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from columns import pairing_plan
+from smoothing import minmax_decimate
+
+READERS = {}
+CACHE_VERSION = 3
+STREAM_CHUNK_ROWS = 4096
+
+
+class SheetReadError(Exception):
+    pass
+
+
+def register_reader(name, opener):
+    def decorator(func):
+        READERS[name] = (opener, func)
+        return func
+    return decorator
+
+
+def is_sheet_pattern(sheet_name):
+    # Excel forbids * ? [ ] in sheet names, so any of them marks a glob pattern.
+    return sheet_name.startswith('re:') or any(char in sheet_name for char in '*?[')
+
+
+def match_sheets(sheet_names, pattern):
+    if pattern.startswith('re:'):
+        regex = re.compile(pattern[3:])
+        return [name for name in sheet_names if regex.fullmatch(name)]
+    return [name for name in sheet_names if fnmatch.fnmatchcase(name, pattern)]
+
+
+def to_float_array(values):
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+
+def has_calamine():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_readers():
+    return [name for name in READERS if name != 'calamine' or has_calamine()]
+
+
+def resolve_reader(name):
+    if name == 'auto':
+        return 'calamine' if has_calamine() else 'openpyxl'
+    if name not in READERS:
+        raise ValueError(f"Unknown reader '{name}', expected one of: auto, {', '.join(READERS)}")
+    return name
+
+
+def open_pandas(filepath):
+    return pd.ExcelFile(filepath)
+
+
+def open_calamine(filepath):
+    return pd.ExcelFile(filepath, engine='calamine')
+
+
+def open_openpyxl(filepath):
+    from openpyxl import load_workbook
+    return load_workbook(filepath, read_only=True, data_only=True)
+
+
+def sheet_names(book):
+    return list(book.sheet_names) if isinstance(book, pd.ExcelFile) else list(book.sheetnames)
+
+
+def plan_keys(plan):
+    # Columns are keyed by their position, so duplicate or non-text headers cannot collide.
+    return [(str(x_idx), str(y_idx)) for x_idx, y_idx in plan.pairs]
+
+
+def read_with_pandas(book, sheet_name, config):
+    offset = config.header_row - 1
+    header = book.parse(sheet_name, header=None, skiprows=offset, nrows=1)
+    plan = pairing_plan(header.iloc[0].tolist() if len(header) else [], config)
+    if not plan.pairs:
+        return [], {}
+    data = book.parse(sheet_name, header=None, skiprows=offset + 1, usecols=plan.usecols)
+    return plan_keys(plan), {str(idx): to_float_array(data[idx] if idx in data else [])
+                             for idx in plan.usecols}
+
+
+@register_reader('pandas', open_pandas)
+def read_pandas(book, sheet_name, config):
+    return read_with_pandas(book, sheet_name, config)
+
+
+@register_reader('calamine', open_calamine)
+def read_calamine(book, sheet_name, config):
+    return read_with_pandas(book, sheet_name, config)
+
+
+def open_sheet_rows(workbook, sheet_name, config):
+    rows = workbook[sheet_name].iter_rows(min_row=config.header_row, values_only=True)
+    plan = pairing_plan(list(next(rows, ())), config)
+    return rows, plan
+
+
+@register_reader('openpyxl', open_openpyxl)
+def read_openpyxl(workbook, sheet_name, config):
+    rows, plan = open_sheet_rows(workbook, sheet_name, config)
+    indices = plan.usecols
+    values = [[] for _ in indices]
+    for row in rows:
+        for column, idx in zip(values, indices):
+            column.append(row[idx] if idx < len(row) else None)
+    return plan_keys(plan), {str(idx): to_float_array(column) for idx, column in zip(indices, values)}
+
+
+class StreamDecimator:
+    # Keeps one X/Y pair reduced to about max_points rows while the sheet is streamed. Each chunk
+    # is folded to per-bucket minima and maxima, with buckets sized from the sheet's row count so
+    # the whole sheet gets the same resolution and memory does not grow with its length.
+    def __init__(self, max_points, total_rows=None):
+        self.max_points = max_points
+        self.bucket_rows = 1
+        if max_points and total_rows and total_rows > max_points:
+            self.bucket_rows = math.ceil(total_rows / max(1, max_points // 2))
+        self.x = np.empty(0, dtype=np.float64)
+        self.y = np.empty(0, dtype=np.float64)
+
+    def append(self, x, y):
+        x, y = finite_pair(x, y)
+        if self.bucket_rows > 1:
+            x, y = minmax_decimate(x, y, 2 * math.ceil(len(x) / self.bucket_rows))
+        self.x = np.concatenate((self.x, x))
+        self.y = np.concatenate((self.y, y))
+        if self.max_points and len(self.x) > 2 * self.max_points:
+            self.x, self.y = minmax_decimate(self.x, self.y, self.max_points)
+
+    def finish(self):
+        # The sheet's row count is not always known up front, so the rest is folded once more.
+        if self.max_points and len(self.x) > self.max_points:
+            self.x, self.y = minmax_decimate(self.x, self.y, self.max_points)
+        return self.x, self.y
+
+
+@register_reader('stream', open_openpyxl)
+def read_stream(workbook, sheet_name, config):
+    sheet = workbook[sheet_name]
+    header = next(sheet.iter_rows(min_row=config.header_row, max_row=config.header_row, values_only=True), ())
+    plan = pairing_plan(list(header), config)
+    indices = plan.pairs
+    total_rows = (sheet.max_row or 0) - config.header_row
+    decimators = [StreamDecimator(config.decimate_threshold, total_rows) for _ in indices]
+    usecols = plan.usecols
+    if not usecols:
+        return [], {}
+
+    # Only the used columns are kept, in a block of STREAM_CHUNK_ROWS rows filled straight from the
+    # row iterator, so memory follows the decimated output rather than the sheet.
+    position = {idx: pos for pos, idx in enumerate(usecols)}
+    pair_positions = [(position[x_idx], position[y_idx]) for x_idx, y_idx in indices]
+    rows = sheet.iter_rows(min_row=config.header_row + 1, max_col=usecols[-1] + 1, values_only=True)
+    block = np.empty((STREAM_CHUNK_ROWS, len(usecols)))
+    filled = STREAM_CHUNK_ROWS
+    while filled == STREAM_CHUNK_ROWS:
+        filled = 0
+        for row in islice(rows, STREAM_CHUNK_ROWS):
+            block[filled] = [row[idx] if idx < len(row) and isinstance(row[idx], (int, float)) else np.nan
+                             for idx in usecols]
+            filled += 1
+        for decimator, (x_pos, y_pos) in zip(decimators, pair_positions):
+            decimator.append(block[:filled, x_pos], block[:filled, y_pos])
+
+    # Each pair keeps its own rows after decimation, so the columns are keyed by pair.
+    keyed_pairs = [(f'{x_idx}|{idx}', f'{y_idx}|{idx}') for idx, (x_idx, y_idx) in enumerate(indices)]
+    columns = {}
+    for (x_key, y_key), decimator in zip(keyed_pairs, decimators):
+        columns[x_key], columns[y_key] = decimator.finish()
+    return keyed_pairs, columns
+
+
+def cache_path(cache_folder, filepath, sheet_name):
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(cache_folder, f'{name}.{sheet_name}.npz')
+
+
+def cache_key(filepath, sheet_name, config, reader_name):
+    stat = os.stat(filepath)
+    return json.dumps({'version': CACHE_VERSION,
+                       'size': stat.st_size,
+                       'mtime_ns': stat.st_mtime_ns,
+                       'sheet': sheet_name,
+                       'num_series': config.num_series,
+                       'columns': [config.header_row, config.x_pattern, config.y_pattern, config.shared_x],
+                       'stream_points': config.decimate_threshold if reader_name == 'stream' else None},
+                      sort_keys=True)
+
+
+def load_cached(path, key):
+    try:
+        with np.load(path, allow_pickle=False) as cached:
+            if str(cached['key']) != key:
+                return None
+            pairs = [tuple(pair) for pair in json.loads(str(cached['pairs']))]
+            columns = {col: cached[f'c{idx}'] for idx, col in enumerate(json.loads(str(cached['columns'])))}
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # A missing, stale or damaged cache file is only a cache miss.
+        return None
+    return pairs, columns
+
+
+def save_cached(path, key, pairs, columns):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    names = list(columns)
+    arrays = {f'c{idx}': columns[col] for idx, col in enumerate(names)}
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, key=np.array(key), pairs=np.array(json.dumps(pairs)),
+             columns=np.array(json.dumps(names)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def finite_pair(x, y):
+    mask = np.isfinite(x) & np.isfinite(y)
+    if mask.all():
+        return x, y
+    return x[mask], y[mask]
+
+
+def sheet_error(filepath, sheet_name):
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    return SheetReadError(f"Error reading sheet '{sheet_name}' from {name}. Please verify the sheet name.")
+
+
+def read_sheets(filepath, config):
+    # Yields (sheet name, series) for every sheet selected by config.sheet_name, opening the
+    # workbook at most once. Cached sheets are served without opening it at all.
+    reader_name = resolve_reader(config.reader)
+    opener, reader = READERS[reader_name]
+    pattern = is_sheet_pattern(config.sheet_name)
+
+    book = None
+    try:
+        if pattern:
+            try:
+                book = opener(filepath)
+            except Exception as e:
+                raise sheet_error(filepath, config.sheet_name) from e
+            selected = match_sheets(sheet_names(book), config.sheet_name)
+            if not selected:
+                raise sheet_error(filepath, config.sheet_name)
+        else:
+            selected = [config.sheet_name]
+
+        for sheet_name in selected:
+            cached = None
+            if config.cache_folder:
+                path = cache_path(config.cache_folder, filepath, sheet_name)
+                key = cache_key(filepath, sheet_name, config, reader_name)
+                cached = load_cached(path, key)
+
+            if cached is None:
+                try:
+                    if book is None:
+                        book = opener(filepath)
+                    pairs, columns = reader(book, sheet_name, config)
+                except Exception as e:
+                    raise sheet_error(filepath, sheet_name) from e
+                if config.cache_folder:
+                    save_cached(path, key, pairs, columns)
+            else:
+                pairs, columns = cached
+
+            # Sheets matched by a pattern that carry no X/Y columns are not graphs.
+            if pattern and not pairs:
+                continue
+            yield sheet_name, [finite_pair(columns[x_col], columns[y_col]) for x_col, y_col in pairs]
+    finally:
+        if book is not None:
+            book.close()
+
+
+def read_series(filepath, config):
+    for _, series in read_sheets(filepath, config):
+        return series
+    return []
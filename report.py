@@ -0,0 +1,119 @@
+import io
+import os
+from dataclasses import replace
+
+from matplotlib.backends.backend_pdf import PdfPages
+
+from engine import convert_file, find_workbooks, iter_figures, rendered_image
+from instrument import stage
+
+REPORT_KINDS = ('pdf', 'sheets')
+TILE_WIDTH = 1200
+
+
+class PdfReport:
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.pdf = PdfPages(path)
+
+    def current_path(self):
+        return self.path
+
+    def add(self, fig):
+        # PdfPages writes every page to disk as soon as it is added.
+        self.pdf.savefig(fig, bbox_inches=None if self.config.fixed_layout else 'tight')
+
+    def close(self):
+        self.pdf.close()
+        return [self.path]
+
+
+class ContactSheetReport:
+    def __init__(self, base_path, config, columns=3, rows=2):
+        from PIL import Image
+
+        self.Image = Image
+        self.base_path = base_path
+        self.config = config
+        self.columns = columns
+        self.rows = rows
+        self.tile_size = (TILE_WIDTH, round(TILE_WIDTH * config.height / config.width))
+        self.page = None
+        self.tiles = 0
+        self.paths = []
+
+    def new_page(self):
+        width, height = self.tile_size
+        self.page = self.Image.new('RGB', (width * self.columns, height * self.rows), 'white')
+        self.tiles = 0
+
+    def current_path(self):
+        return f'{self.base_path}-{len(self.paths) + 1:03d}.png'
+
+    def flush(self):
+        if self.page is None:
+            return
+        path = self.current_path()
+        self.page.save(path, format='PNG', compress_level=self.config.png_compression)
+        self.paths.append(path)
+        self.page = None
+
+    def add(self, fig):
+        image = rendered_image(fig, self.config)
+        if image is None:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', bbox_inches='tight')
+            buffer.seek(0)
+            image = self.Image.open(buffer)
+        image = image.convert('RGB')
+        image.thumbnail(self.tile_size, self.Image.LANCZOS)
+
+        if self.page is None:
+            self.new_page()
+        width, height = self.tile_size
+        column = self.tiles % self.columns
+        row = self.tiles // self.columns
+        self.page.paste(image, (column * width + (width - image.width) // 2,
+                                row * height + (height - image.height) // 2))
+        self.tiles += 1
+        if self.tiles == self.columns * self.rows:
+            self.flush()
+
+    def close(self):
+        self.flush()
+        return self.paths
+
+
+def write_report(config, kind='pdf', name='report', grid=(3, 2), filepaths=None, on_result=None):
+    if filepaths is None:
+        filepaths = find_workbooks(config.input_folder)
+    os.makedirs(config.output_folder, exist_ok=True)
+    base_path = os.path.join(config.output_folder, name)
+
+    if kind == 'pdf':
+        report = PdfReport(f'{base_path}.pdf', config)
+    else:
+        # Tiles are small, so the graphs are drawn at the resolution they are shown at.
+        config = replace(config, dpi=max(1, round(TILE_WIDTH / config.width)))
+        report = ContactSheetReport(base_path, config, *grid)
+
+    def render(filepath, config, timings, curves, compared):
+        outputs = []
+        for _, fig in iter_figures(filepath, config, timings, curves, compared):
+            if report.current_path() not in outputs:
+                outputs.append(report.current_path())
+            with stage(timings, 'save'):
+                report.add(fig)
+        return outputs
+
+    results = []
+    try:
+        for filepath in filepaths:
+            result = convert_file(filepath, config, render)
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+    finally:
+        outputs = report.close()
+    return outputs, results
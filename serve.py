@@ -0,0 +1,207 @@
+import argparse
+import math
+import mimetypes
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from dataclasses import fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from batch import default_workers, init_worker, warm_worker
+from engine import GraphConfig, LEGEND_POSITIONS, NON_RENDER_FIELDS, OUTPUT_FORMATS, iter_figures, save_figure
+from readers import SheetReadError
+from smoothing import STRATEGIES
+
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+RENDER_TIMEOUT = 120
+
+# Query parameters use the command line option names, the GraphConfig field names work as well.
+PARAM_ALIASES = {'sheet': 'sheet_name', 'series': 'num_series', 'legend': 'legend_position',
+                 'font': 'graph_font', 'color': 'series_colors', 'marker': 'series_markers',
+                 'name': 'series_names', 'format': 'formats'}
+CHOICES = {'legend_position': LEGEND_POSITIONS, 'formats': OUTPUT_FORMATS, 'smoothing': list(STRATEGIES)}
+# Inclusive bounds of the numeric settings, None when a side is open. Width and height only need to be positive.
+LIMITS = {'num_series': (1, None), 'header_row': (1, None), 'dpi': (1, None), 'png_compression': (0, 9),
+          'quality': (1, 100), 'decimate_threshold': (0, None)}
+POSITIVE = ('width', 'height')
+
+
+def parse_value(kind, values):
+    # kind is the annotated type of the GraphConfig field, so width=12.5 parses even though the
+    # default width is the int 12.
+    if kind is list:
+        return values
+    value = values[-1]
+    if kind is bool:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    if kind in (int, float):
+        return kind(value)
+    return value
+
+
+def config_from_query(query, base_config):
+    kinds = {f.name: f.type for f in fields(GraphConfig) if f.name not in NON_RENDER_FIELDS}
+    changes = {}
+    for key, values in parse_qs(query).items():
+        name = PARAM_ALIASES.get(key.replace('-', '_'), key.replace('-', '_'))
+        if name not in kinds:
+            raise ValueError(f"Unknown setting '{key}'.")
+        try:
+            changes[name] = parse_value(kinds[name], values)
+        except ValueError:
+            raise ValueError(f"Invalid value for '{key}': {values[-1]}")
+        chosen = changes[name] if isinstance(changes[name], list) else [changes[name]]
+        if name in CHOICES and any(value not in CHOICES[name] for value in chosen):
+            raise ValueError(f"'{key}' must be one of {', '.join(CHOICES[name])}.")
+        if name in POSITIVE and not 0 < changes[name] < math.inf:
+            raise ValueError(f"'{key}' must be greater than 0.")
+        if name in LIMITS:
+            low, high = LIMITS[name]
+            if changes[name] < low or (high is not None and changes[name] > high):
+                raise ValueError(f"'{key}' must be between {low} and {high}." if high is not None
+                                 else f"'{key}' must be at least {low}.")
+    # Only the first format is returned, so the worker does not encode the others.
+    if 'formats' in changes:
+        changes['formats'] = changes['formats'][:1]
+    return replace(base_config, **changes)
+
+
+def render_upload(data, filename, config):
+    # Runs in a worker process. Only the first graph is returned when the sheet name is a pattern.
+    with tempfile.TemporaryDirectory(prefix='excel2graph-') as folder:
+        filepath = os.path.join(folder, filename)
+        with open(filepath, 'wb') as f:
+            f.write(data)
+        config = replace(config, input_folder=folder, output_folder=folder, cache_folder=None)
+        for base_path, fig in iter_figures(filepath, config):
+            path = save_figure(fig, base_path, config)[0]
+            with open(path, 'rb') as f:
+                return f.read()
+    raise SheetReadError(f"No sheet matching '{config.sheet_name}' has X/Y columns.")
+
+
+class RenderService:
+    def __init__(self, config, workers=None, max_queue=None):
+        self.config = config
+        self.workers = workers or default_workers()
+        # Requests beyond the workers wait in the pool queue, and beyond max_queue they are refused.
+        self.slots = threading.BoundedSemaphore(max_queue or 4 * self.workers)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        warm = [self.pool.submit(warm_worker, config) for _ in range(self.workers)]
+        for future in warm:
+            future.result()
+
+    def render(self, data, filename, config):
+        if not self.slots.acquire(blocking=False):
+            return None
+        try:
+            future = self.pool.submit(render_upload, data, filename, config)
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is held until the worker is done, also after a timeout, so renders that are
+        # still running keep counting against max_queue.
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=RENDER_TIMEOUT)
+        except TimeoutError:
+            # A render still waiting in the queue is dropped, which also frees its slot.
+            future.cancel()
+            raise
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def send_text(self, status, text):
+        body = (text + '\n').encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self.send_text(200, 'ok')
+        else:
+            self.send_text(404, 'Not found.')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/render':
+            self.send_text(404, 'Not found.')
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self.send_text(400, 'Send the workbook as the request body.')
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.send_text(413, 'Workbook is too large.')
+            return
+        try:
+            config = config_from_query(url.query, self.service.config)
+        except ValueError as e:
+            self.send_text(400, str(e))
+            return
+
+        data = self.rfile.read(length)
+        filename = os.path.basename(self.headers.get('X-Filename') or 'workbook.xlsx')
+        try:
+            image = self.service.render(data, filename, config)
+        except SheetReadError as e:
+            self.send_text(422, str(e))
+            return
+        except TimeoutError:
+            self.send_text(504, 'Rendering took too long.')
+            return
+        except Exception as e:
+            self.send_text(422, f'Error processing workbook: {e}')
+            return
+        if image is None:
+            self.send_text(503, 'Too many requests are waiting, try again later.')
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', mimetypes.guess_type(f'graph.{config.formats[0]}')[0]
+                         or 'application/octet-stream')
+        self.send_header('Content-Length', str(len(image)))
+        self.end_headers()
+        self.wfile.write(image)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve graph rendering over HTTP on this machine.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("-j", "--workers", type=int, default=default_workers(),
+                        help="number of render worker processes (default: %(default)s)")
+    parser.add_argument("--max-queue", type=int,
+                        help="requests rendering or waiting at once before new ones get 503 (default: 4 per worker)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    service = RenderService(GraphConfig(), args.workers, args.max_queue)
+    RenderHandler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), RenderHandler)
+    print(f'Serving graphs on http://{args.host}:{args.port}/render, press Ctrl+C to stop.')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import numpy as np
+from scipy import interpolate
+
+SMOOTH_POINTS = 1000
+DECIMATE_POINTS = 2000
+
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    def decorator(func):
+        STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+def sort_and_merge(x, y):
+    # Sorted x with the y values of repeated x averaged, so splines get strictly increasing knots.
+    sort_idx = np.argsort(x, kind='stable')
+    x = x[sort_idx]
+    y = y[sort_idx]
+    if len(x) < 2 or np.all(x[1:] != x[:-1]):
+        return x, y
+    starts = np.flatnonzero(np.concatenate(([True], x[1:] != x[:-1])))
+    counts = np.diff(np.append(starts, len(x)))
+    return x[starts], np.add.reduceat(y, starts) / counts
+
+
+def minmax_decimate(x, y, n_out):
+    n_buckets = n_out // 2
+    if len(x) <= n_out or n_buckets < 1:
+        return x, y
+    edges = np.linspace(0, len(x), n_buckets + 1).astype(np.intp)[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(np.append(edges, len(x))))
+
+    y_min = np.minimum.reduceat(y, edges)
+    y_max = np.maximum.reduceat(y, edges)
+    # First index in each bucket that hits the bucket minimum/maximum.
+    min_idx = np.flatnonzero(y == y_min[bucket])
+    max_idx = np.flatnonzero(y == y_max[bucket])
+    min_idx = min_idx[np.unique(bucket[min_idx], return_index=True)[1]]
+    max_idx = max_idx[np.unique(bucket[max_idx], return_index=True)[1]]
+
+    idx = np.unique(np.concatenate((min_idx, max_idx)))
+    return x[idx], y[idx]
+
+
+def pixel_envelope(x, y, columns):
+    # Outline of the band between the lowest and highest y of every pixel column of sorted x. At
+    # that width it draws the same image as the full series, with two vertices per column.
+    column = np.minimum(((x - x[0]) * (columns / (x[-1] - x[0]))).astype(np.intp), columns - 1)
+    starts = np.flatnonzero(np.concatenate(([True], column[1:] != column[:-1])))
+    ends = np.append(starts[1:], len(x)) - 1
+    x_mid = (x[starts] + x[ends]) / 2
+    y_min = np.minimum.reduceat(y, starts)
+    y_max = np.maximum.reduceat(y, starts)
+    return np.column_stack((np.concatenate((x_mid, x_mid[::-1])), np.concatenate((y_max, y_min[::-1]))))
+
+
+def lttb_decimate(x, y, n_out):
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0] = 0
+    idx[-1] = n - 1
+    prev = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        idx[bucket + 1] = prev
+    return x[idx], y[idx]
+
+
+def smooth_grid(x):
+    return np.linspace(x[0], x[-1], SMOOTH_POINTS)
+
+
+@register_strategy('spline')
+def interpolating_spline(x, y):
+    tck = interpolate.splrep(x, y, s=0)
+    x_smooth = smooth_grid(x)
+    return x_smooth, interpolate.splev(x_smooth, tck)
+
+
+@register_strategy('smoothing-spline')
+def smoothing_spline(x, y):
+    spline = interpolate.make_smoothing_spline(x, y)
+    x_smooth = smooth_grid(x)
+    return x_smooth, spline(x_smooth)
+
+
+@register_strategy('interp-spline')
+def interp_spline(x, y):
+    spline = interpolate.make_interp_spline(x, y, k=3)
+    x_smooth = smooth_grid(x)
+    return x_smooth, spline(x_smooth)
+
+
+@register_strategy('lttb')
+def lttb(x, y):
+    return lttb_decimate(x, y, SMOOTH_POINTS)
+
+
+@register_strategy('minmax')
+def minmax(x, y):
+    return minmax_decimate(x, y, SMOOTH_POINTS)
+
+
+@register_strategy('none')
+def raw(x, y):
+    return x, y
+
+
+def smooth_series(x, y, strategy='spline', decimate_threshold=None):
+    # Returns the sorted points (used for markers) and the curve to draw. Series longer than
+    # decimate_threshold rows are reduced with LTTB first so fitting time stays bounded.
+    try:
+        x, y = sort_and_merge(x, y)
+        if len(x) <= 3:
+            return x, y, x, y
+
+        x_fit, y_fit = x, y
+        if decimate_threshold and len(x) > decimate_threshold and strategy not in ('lttb', 'minmax'):
+            x_fit, y_fit = lttb_decimate(x, y, DECIMATE_POINTS)
+
+        x_line, y_line = STRATEGIES[strategy](x_fit, y_fit)
+        return x, y, x_line, y_line
+    except Exception:
+        return x, y, x, y
@@ -0,0 +1,46 @@
+from functools import lru_cache
+
+from matplotlib import font_manager
+
+# Metric-compatible or look-alike families tried when a font is not installed. STIXGeneral and
+# DejaVu ship with matplotlib, so every chain ends in a font that exists.
+FONT_FALLBACKS = {
+    'Times New Roman': ['Liberation Serif', 'Tinos', 'Nimbus Roman', 'TeX Gyre Termes', 'STIXGeneral'],
+    'Arial': ['Liberation Sans', 'Arimo', 'Nimbus Sans', 'Helvetica', 'DejaVu Sans'],
+    'Helvetica': ['Nimbus Sans', 'Liberation Sans', 'Arimo', 'Arial', 'DejaVu Sans'],
+    'Calibri': ['Carlito', 'Liberation Sans', 'Arial', 'DejaVu Sans'],
+    'Cambria': ['Caladea', 'Liberation Serif', 'Times New Roman', 'STIXGeneral'],
+    'Georgia': ['Gelasio', 'Liberation Serif', 'STIXGeneral'],
+}
+DEFAULT_FONT = 'DejaVu Sans'
+
+
+@lru_cache(maxsize=1)
+def installed_fonts():
+    return frozenset(font.name for font in font_manager.fontManager.ttflist)
+
+
+@lru_cache(maxsize=None)
+def resolve_font(family, fallbacks=()):
+    # The first installed family of the chain, looked up once per process, so matplotlib never
+    # searches (and warns) for a missing font while rendering.
+    installed = installed_fonts()
+    for name in (family, *fallbacks, *FONT_FALLBACKS.get(family, ())):
+        if name in installed:
+            return name
+    return DEFAULT_FONT
+
+
+@lru_cache(maxsize=None)
+def resolve_weight(family, weight):
+    # The nearest weight the family is installed in, so matplotlib does not warn while substituting it.
+    wanted = font_manager.weight_dict.get(weight, weight)
+    weights = {font_manager.weight_dict.get(font.weight, font.weight)
+               for font in font_manager.fontManager.ttflist if font.name == family}
+    if not weights or wanted in weights:
+        return weight
+    return min(weights, key=lambda available: abs(available - wanted))
+
+
+def graph_font(config):
+    return resolve_font(config.graph_font, tuple(config.font_fallbacks))
@@ -0,0 +1,118 @@
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from batch import default_workers, init_worker, warm_worker
+from engine import FileResult, convert_file, find_workbooks, workbook_name
+from manifest import Manifest, record_result
+
+POLL_SECONDS = 1.0
+SETTLE_SECONDS = 2.0
+
+
+def file_key(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FolderWatcher:
+    def __init__(self, config, workers=None, on_result=None, check_content=False, settle=SETTLE_SECONDS):
+        self.config = config
+        self.workers = workers or default_workers()
+        self.on_result = on_result
+        self.settle = settle
+        self.manifest = Manifest(config.output_folder, check_content)
+        # filepath -> [(size, mtime_ns), monotonic time that key was first seen, key already handled]
+        self.seen = {}
+        # future -> (filepath, key of the file when it was submitted)
+        self.running = {}
+        self.pool = None
+
+    def start(self):
+        os.makedirs(self.config.output_folder, exist_ok=True)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        # Every worker imports the engine and draws the styled figure once before the first drop.
+        warm = [self.pool.submit(warm_worker, self.config) for _ in range(self.workers)]
+        wait(warm)
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        self.manifest.save()
+
+    def ready_files(self):
+        # A workbook is only rendered once its size and mtime stayed the same for `settle` seconds,
+        # so files that are still being copied into the folder are left alone.
+        now = time.monotonic()
+        filepaths = find_workbooks(self.config.input_folder)
+        for filepath in set(self.seen) - set(filepaths):
+            del self.seen[filepath]
+
+        running = {filepath for filepath, _ in self.running.values()}
+        ready = []
+        for filepath in filepaths:
+            key = file_key(filepath)
+            if key is None:
+                continue
+            state = self.seen.get(filepath)
+            if state is None or state[0] != key:
+                self.seen[filepath] = [key, now, False]
+                continue
+            if state[2] or filepath in running or now - state[1] < self.settle:
+                continue
+            state[2] = True
+            ready.append(filepath)
+        return ready
+
+    def submit(self, filepath):
+        if self.manifest.is_current(filepath, self.config.settings_hash()):
+            return
+        if not zipfile.is_zipfile(filepath):
+            self.finish(FileResult(filepath, workbook_name(filepath),
+                                   error=f"{workbook_name(filepath)} is not a complete workbook."))
+            return
+        self.running[self.pool.submit(convert_file, filepath, self.config)] = (filepath, self.seen[filepath][0])
+
+    def finish(self, result, record=True):
+        if record:
+            record_result(self.manifest, result, self.config)
+            self.manifest.save()
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def collect(self, timeout):
+        if not self.running:
+            time.sleep(timeout)
+            return
+        done, _ = wait(self.running, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            filepath, key = self.running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = FileResult(filepath, workbook_name(filepath),
+                                    error=f"Error processing {workbook_name(filepath)}: {e}")
+            # A workbook that changed while it was rendered stays out of the manifest, and is rendered
+            # again once the new version has settled.
+            self.finish(result, record=file_key(filepath) == key)
+
+    def poll(self, timeout=POLL_SECONDS):
+        for filepath in self.ready_files():
+            self.submit(filepath)
+        self.collect(timeout)
+
+
+def watch_folder(config, workers=None, on_result=None, check_content=False, poll=POLL_SECONDS,
+                 settle=SETTLE_SECONDS, stop_event=None):
+    watcher = FolderWatcher(config, workers, on_result, check_content, settle)
+    watcher.start()
+    try:
+        while stop_event is None or not stop_event.is_set():
+            watcher.poll(poll)
+    finally:
+        watcher.stop()